@@ -0,0 +1,255 @@
+"""
+CAD 도면 파일명 변환기 — 성능 측정
+합성 DXF 생성 → 파싱 함수 / HTTP API(scan·preview·rename) 처리량·최대 메모리 측정 → 기준값 저장·비교
+DWG 변환기 없이 Linux에서 실행 (ODA File Converter 대신 스텁 스크립트 사용)
+
+  python benchmark.py                                   # quick 프리셋
+  python benchmark.py --files 10,1000,10000 --size 64K
+  python benchmark.py --size 200M --files 1 --cases parse
+  python benchmark.py --save base.json                  # 기준값 저장
+  python benchmark.py --compare base.json               # 기준값과 비교 (느려지면 종료코드 1)
+"""
+import argparse, json, os, random, resource, shutil, subprocess, sys, tempfile, threading, time
+import http.server, urllib.request
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+CASES = ("parse", "scan", "preview", "rename")
+PRESETS = {"quick": {"files": "10,100", "size": "256K"},
+           "full":  {"files": "10,100,1000,10000", "size": "64K,4M"}}
+
+# ── 합성 DXF ─────────────────────────────────────────────
+def _size(s):
+    s = s.strip().upper(); m = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    return int(float(s[:-1]) * m[s[-1]]) if s[-1] in m else int(s)
+
+# 텍스트 엔티티 texts개 + LINE 엔티티로 size 바이트까지 채운 DXF
+def gen_dxf(path, size=256 << 10, texts=200, layers=8, mtext=0.3, encoding="utf-8", seed=0):
+    r = random.Random(seed); nl = "\r\n"
+    names = ["TITLE"] + [f"LAYER-{k}" for k in range(1, layers)]
+    utf8 = encoding.replace("-", "").lower() == "utf8"
+    head = ["0","SECTION","2","HEADER","9","$ACADVER","1","AC1027" if utf8 else "AC1015",
+            "9","$DWGCODEPAGE","3","ANSI_1252" if utf8 else "ANSI_949","0","ENDSEC",
+            "0","SECTION","2","TABLES","0","ENDSEC","0","SECTION","2","ENTITIES"]
+    tail = ["0","ENDSEC","0","SECTION","2","OBJECTS","0","ENDSEC","0","EOF"]
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(nl.join(head) + nl)
+        for k in range(texts):
+            x, y, h = r.uniform(0, 840), r.uniform(0, 594), r.uniform(1.5, 12)
+            if r.random() < mtext:
+                rec = ["0","MTEXT","8",r.choice(names),"10",f"{x:.4f}","20",f"{y:.4f}","40",f"{h:.2f}",
+                       "1",f"{{\\fgulim|b0;도면 제목 {k}\\P{r.randint(1, 999)}}}"]
+            else:
+                rec = ["0","TEXT","8",r.choice(names),"10",f"{x:.4f}","20",f"{y:.4f}","40",f"{h:.2f}",
+                       "1",f"배관 계통도-{k}" if k % 3 else f"{k}"]
+            f.write(nl.join(rec) + nl)
+        line = nl.join(["0","LINE","8","0","10","1.0","20","2.0","11","3.0","21","4.0"]) + nl
+        rest = size - f.tell() - 64
+        if rest > 0: f.write(line * (rest // len(line.encode(encoding))))
+        f.write(nl.join(tail) + nl)
+
+# 원본 한 벌(인코딩별)을 만들어 복사 → 파일 수가 많아도 생성이 빠름. dwg_ratio 비율은 .dwg 로 저장
+def make_folder(root, n, size, dwg_ratio, **kw):
+    root = Path(root); root.mkdir(parents=True, exist_ok=True)
+    srcs = []
+    for enc in kw.pop("encodings", ["utf-8"]):
+        p = root.parent / f"_src_{enc}_{size}.dxf"
+        if not p.exists(): gen_dxf(p, size, encoding=enc, **kw)
+        srcs.append(p)
+    ndwg = int(n * dwg_ratio)
+    for k in range(n):
+        shutil.copyfile(srcs[k % len(srcs)], root / f"DWG-{k:05d}.{'dwg' if k < ndwg else 'dxf'}")
+    return root
+
+STUB = """#!{py}
+# ODA File Converter 대용: 입력 폴더의 DWG(실제로는 DXF 내용)를 출력 폴더에 .dxf 로 복사
+import fnmatch, os, shutil, sys
+src, out, filt = sys.argv[1], sys.argv[2], sys.argv[7].lower()
+for f in os.listdir(src):
+    stem, ext = os.path.splitext(f)
+    if ext.lower() == ".dwg" and (fnmatch.fnmatch(f.lower(), filt) or stem.lower() == filt):
+        shutil.copyfile(os.path.join(src, f), os.path.join(out, stem + ".dxf"))
+"""
+
+def write_stub(d):
+    p = Path(d) / "oda_stub"
+    p.write_text(STUB.format(py=sys.executable)); p.chmod(0o755)
+    return str(p)
+
+# ── 측정 (케이스마다 별도 프로세스 → 최대 RSS 분리) ─────────
+# 단일 프로세스 최대 RSS — 이 프로세스와 (종료된) 자식 중 가장 큰 하나. 파싱 워커들의 합은 아님
+def _peak_rss_mb():
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    kids_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(self_kb, kids_kb) / 1024, 1)
+
+# 프로세스 트리(파싱 워커·변환기 포함)의 VmRSS 합계 (Linux /proc 전용, 없으면 0)
+def _tree_rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            kb = next(int(l.split()[1]) for l in f if l.startswith("VmRSS:"))
+        kids = []
+        for t in os.listdir(f"/proc/{pid}/task"):
+            try:
+                with open(f"/proc/{pid}/task/{t}/children") as f: kids += [int(c) for c in f.read().split()]
+            except OSError: pass
+    except (OSError, StopIteration): return 0
+    return kb + sum(_tree_rss_kb(c) for c in kids)
+
+# 측정 중 every초마다 프로세스 트리 RSS 합계를 재어 최대값 보관
+class RssSampler(threading.Thread):
+    def __init__(self, every=0.05):
+        super().__init__(daemon=True); self.every = every; self.peak_kb = 0; self.halt = threading.Event()
+
+    def run(self):
+        while True:
+            self.peak_kb = max(self.peak_kb, _tree_rss_kb(os.getpid()))
+            if self.halt.wait(self.every): return
+
+    def stop(self):
+        self.halt.set(); self.join()
+        return round(self.peak_kb / 1024, 1) if self.peak_kb else None
+
+def _post(port, path, body):
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", json.dumps(body).encode(),
+                                 {"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=3600) as r: return json.loads(r.read())
+
+def run_case(spec):
+    sys.path.insert(0, str(HERE))
+    import cad_renamer as cr
+    cr.CONV_TYPE, cr.CONV_PATH = "oda", spec["stub"]
+    folder = Path(spec["folder"]); files = sorted(folder.iterdir())
+    nbytes = sum(f.stat().st_size for f in files); case = spec["case"]
+    t = {}; parsed = {}; rss = RssSampler(); rss.start()
+    if case == "parse":
+        t0 = time.perf_counter()
+        for f in files:
+            if f.suffix == ".dxf": cr.text_index(str(f))
+        t["parse"] = time.perf_counter() - t0
+        nbytes = sum(f.stat().st_size for f in files if f.suffix == ".dxf")
+        nfiles = sum(1 for f in files if f.suffix == ".dxf")
+    else:
+        srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), cr.Handler)
+        port = srv.server_address[1]
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        nfiles = len(files)
+        if case == "scan":
+            # scan은 레이어 통계용으로 표본(STATS_SAMPLE 안팎)만 파싱 → 처리량은 실제 파싱한 파일 수 기준
+            t0 = time.perf_counter(); s = _post(port, "/api/scan", {"folder": str(folder)})
+            t["scan"] = time.perf_counter() - t0; parsed["scan"] = s.get("sampled", nfiles)
+        else:
+            # scan을 거치지 않은 첫 preview = 변환·파싱 포함(cold), 다른 레이어 재요청 = 인덱스 캐시(warm)
+            fl = cr.list_cad_files(folder)
+            t0 = time.perf_counter(); p = _post(port, "/api/preview", {"files": fl, "layer": "TITLE"})
+            t["preview_cold"] = time.perf_counter() - t0
+            t0 = time.perf_counter(); _post(port, "/api/preview", {"files": fl, "layer": "LAYER-1"})
+            t["preview_warm"] = time.perf_counter() - t0
+        if case == "rename":
+            items = [{"path": x["path"], "new_name": x["title"] or "untitled"} for x in p["results"]]
+            t0 = time.perf_counter(); j = _post(port, "/api/rename", {"items": items})
+            t["rename"] = time.perf_counter() - t0
+            t0 = time.perf_counter(); _post(port, "/api/undo", {"journal": j["journal"]})
+            t["undo"] = time.perf_counter() - t0
+        srv.shutdown()
+    rss_sum = rss.stop()
+    if cr._parse_pool: cr._parse_pool.shutdown()
+    mb = nbytes / (1 << 20)
+    # rss_mb: 가장 큰 단일 프로세스, rss_sum_mb: 모든 워커를 더한 최대값 (/proc 없는 환경에서는 None)
+    return {"case": case, "files": nfiles, "size": spec["size"], "mb": round(mb, 2), "rss_mb": _peak_rss_mb(),
+            "rss_sum_mb": rss_sum,
+            "stages": {k: _rates(v, parsed.get(k, nfiles), nfiles, mb) for k, v in t.items()}}
+
+# 단계별 처리량 — n: 그 단계가 실제로 처리(파싱)한 파일 수 (MB는 폴더 평균 크기로 환산)
+def _rates(sec, n, nfiles, mb):
+    mb = mb * n / nfiles if nfiles else 0
+    return {"sec": round(sec, 4), "processed": n, "files_s": round(n / sec, 1) if sec else 0,
+            "mb_s": round(mb / sec, 1) if sec else 0}
+
+def _spawn(spec):
+    env = dict(os.environ, CAD_RENAMER_CACHE=spec["cache"], CAD_RENAMER_DB=spec["cache"] + ".sqlite3")
+    out = subprocess.run([sys.executable, __file__, "--run-case", json.dumps(spec)],
+                         capture_output=True, text=True, env=env)
+    if out.returncode: raise RuntimeError(out.stderr.strip()[-2000:])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+# ── 기준값 비교 ──────────────────────────────────────────
+def _mb(v): return f"{v:>7.1f} MB" if v is not None else "      - MB"
+
+def _key(r, stage): return f"{r['case']}/{stage}/{r['files']}x{r['size']}"
+
+def compare(results, base_path, tol, min_delta):
+    base = {}
+    for r in json.loads(Path(base_path).read_text(encoding="utf-8"))["results"]:
+        for st, v in r["stages"].items(): base[_key(r, st)] = (v["sec"], r["rss_mb"], r.get("rss_sum_mb"))
+    worse = 0
+    print(f"\n  기준값 비교 ({base_path}, 허용 {tol:.0%})")
+    for r in results:
+        for st, v in r["stages"].items():
+            b = base.get(_key(r, st))
+            if not b: continue
+            d = (v["sec"] - b[0]) / b[0] if b[0] else 0
+            big = abs(v["sec"] - b[0]) >= min_delta   # 측정 잡음 수준의 차이는 무시
+            flag = "▲ 느려짐" if big and d > tol else ("▼ 빨라짐" if big and d < -tol else "")
+            worse += flag.startswith("▲")
+            print(f"  {_key(r, st):<40} {b[0]:>9.3f}s → {v['sec']:>9.3f}s  {d:+7.1%}  "
+                  f"RSS(최대 1프로세스) {b[1]:>7.1f} → {r['rss_mb']:>7.1f} MB  "
+                  f"합계 {_mb(b[2])} → {_mb(r.get('rss_sum_mb'))}  {flag}")
+    return worse
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="CAD 도면 파일명 변환기 성능 측정")
+    ap.add_argument("--preset", choices=PRESETS, default="quick")
+    ap.add_argument("--files", help="폴더당 파일 수 목록 (예: 10,100,1000)")
+    ap.add_argument("--size", help="파일 크기 목록 (예: 64K,4M,200M)")
+    ap.add_argument("--texts", type=int, default=200, help="파일당 텍스트 엔티티 수")
+    ap.add_argument("--layers", type=int, default=8)
+    ap.add_argument("--mtext", type=float, default=0.3, help="MTEXT 비율 (나머지 TEXT)")
+    ap.add_argument("--encoding", default="utf-8", help="utf-8, cp949 또는 utf-8,cp949 (번갈아 사용)")
+    ap.add_argument("--dwg-ratio", type=float, default=0.5, help="스텁 변환기를 거치는 .dwg 비율")
+    ap.add_argument("--cases", default=",".join(CASES))
+    ap.add_argument("--save", help="결과를 기준값 파일로 저장")
+    ap.add_argument("--compare", help="기준값 파일과 비교")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="느려짐 판정 비율")
+    ap.add_argument("--min-delta", type=float, default=0.05, help="느려짐 판정 최소 차이(초)")
+    ap.add_argument("--keep", action="store_true", help="생성한 임시 폴더 유지")
+    ap.add_argument("--run-case", help=argparse.SUPPRESS)
+    a = ap.parse_args(argv)
+    if a.run_case:
+        print(json.dumps(run_case(json.loads(a.run_case)))); return 0
+
+    files = [int(x) for x in (a.files or PRESETS[a.preset]["files"]).split(",")]
+    sizes = [x.strip() for x in (a.size or PRESETS[a.preset]["size"]).split(",")]
+    work = Path(tempfile.mkdtemp(prefix="cad_bench_")); stub = write_stub(work)
+    results = []
+    try:
+        for size in sizes:
+            for n in files:
+                for case in a.cases.split(","):
+                    # rename은 폴더를 바꾸고 캐시도 케이스별로 새로 → 매번 새 폴더·캐시
+                    folder = make_folder(work / f"{case}_{n}_{size}", n, _size(size), a.dwg_ratio,
+                                         texts=a.texts, layers=a.layers, mtext=a.mtext,
+                                         encodings=a.encoding.split(","))
+                    spec = {"case": case, "folder": str(folder), "size": size, "stub": stub,
+                            "cache": str(work / f"cache_{case}_{n}_{size}")}
+                    r = _spawn(spec); results.append(r)
+                    for st, v in r["stages"].items():
+                        done = v.get("processed", r["files"])   # scan은 표본만 파싱
+                        print(f"  {_key(r, st):<40} {v['sec']:>9.3f}s {v['files_s']:>9.1f} files/s "
+                              f"({done}/{r['files']}개) "
+                              f"{v['mb_s']:>8.1f} MB/s  RSS {r['rss_mb']:>7.1f} MB(최대 1프로세스) "
+                              f"{_mb(r.get('rss_sum_mb'))}(합계)", flush=True)
+                    shutil.rmtree(folder, ignore_errors=True)
+    finally:
+        if not a.keep: shutil.rmtree(work, ignore_errors=True)
+    meta = {"python": sys.version.split()[0], "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+    if a.save:
+        Path(a.save).write_text(json.dumps({"meta": meta, "results": results}, ensure_ascii=False, indent=1),
+                                encoding="utf-8")
+        print(f"\n  기준값 저장: {a.save}")
+    if a.compare:
+        return 1 if compare(results, a.compare, a.tolerance, a.min_delta) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
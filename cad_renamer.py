@@ -3,8 +3,13 @@ CAD 도면 파일명 일괄 변환기
 PyInstaller로 단일 EXE 빌드 → Python 설치 불필요
 DWG / DXF → 레이어 텍스트 추출 → 원본 파일명 직접 변경
 """
-import http.server, json, os, re, shutil, subprocess
-import tempfile, threading, time, webbrowser
+import argparse, codecs, cProfile, csv, errno, hashlib, http.server, io, json, os, pstats, re, shutil, subprocess, sys
+import mmap, multiprocessing, random, sqlite3, tempfile, threading, time, webbrowser
+from array import array
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlsplit
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
 
 PORT = 19877
@@ -29,70 +34,361 @@ def find_converter():
 
 CONV_TYPE, CONV_PATH = find_converter()
 
+# ── 단계별 측정 (히스토그램 / 카운터) ───────────────────
+# 변환·파싱·디코딩·제목 선택·이름 변경 등 단계별 소요 시간, 변환기 종료코드, 캐시 적중률 → /api/metrics
+class Metrics:
+    SEC_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+    BYTE_BUCKETS = (1 << 16, 1 << 20, 1 << 22, 1 << 24, 1 << 26, 1 << 28, 1 << 30)
+    COUNT_BUCKETS = (10, 100, 1000, 10000, 100000)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hists = {}; self.counters = Counter(); self.recent = deque(maxlen=200)
+
+    def observe(self, name, value, buckets=SEC_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            h = self.hists.get(key)
+            if h is None: h = self.hists[key] = {"buckets":buckets, "counts":[0] * len(buckets), "sum":0.0, "count":0}
+            for k, b in enumerate(buckets):
+                if value <= b: h["counts"][k] += 1
+            h["sum"] += value; h["count"] += 1
+
+    def inc(self, name, n=1, **labels):
+        with self.lock: self.counters[(name, tuple(sorted(labels.items())))] += n
+
+    def file(self, **rec):
+        with self.lock: self.recent.append(rec)
+
+    def snapshot(self):
+        with self.lock:
+            hists = [{"name":n, "labels":dict(l), "count":h["count"], "sum":round(h["sum"], 6),
+                      "avg":round(h["sum"] / h["count"], 6) if h["count"] else 0,
+                      "buckets":dict(zip(map(str, h["buckets"]), h["counts"]))} for (n, l), h in self.hists.items()]
+            counters = [{"name":n, "labels":dict(l), "value":v} for (n, l), v in self.counters.items()]
+            hit = {}
+            for (n, l), v in self.counters.items():
+                if n == "cache_total": hit.setdefault(dict(l)["cache"], Counter())[dict(l)["result"]] += v
+            rates = {c: round(v["hit"] / (v["hit"] + v["miss"]), 4) for c, v in hit.items() if v["hit"] + v["miss"]}
+            return {"histograms":hists, "counters":counters, "cache_hit_rate":rates, "recent_files":list(self.recent)}
+
+    def prometheus(self):
+        def lab(l, extra=()):
+            l = list(l) + list(extra)
+            return "{" + ",".join(f'{k}="{str(v).replace(chr(34), "")}"' for k, v in l) + "}" if l else ""
+        out = []; typed = set()
+        with self.lock:
+            for (n, l), h in sorted(self.hists.items()):
+                m = f"cad_renamer_{n}"
+                if m not in typed: typed.add(m); out.append(f"# TYPE {m} histogram")
+                for b, c in zip(h["buckets"], h["counts"]): out.append(f"{m}_bucket{lab(l, [('le', b)])} {c}")
+                out.append(f"{m}_bucket{lab(l, [('le', '+Inf')])} {h['count']}")
+                out.append(f"{m}_sum{lab(l)} {h['sum']}"); out.append(f"{m}_count{lab(l)} {h['count']}")
+            for (n, l), v in sorted(self.counters.items(), key=lambda kv: (kv[0][0], str(kv[0][1]))):
+                m = f"cad_renamer_{n}"
+                if m not in typed: typed.add(m); out.append(f"# TYPE {m} counter")
+                out.append(f"{m}{lab(l)} {v}")
+        return "\n".join(out) + "\n"
+
+METRICS = Metrics()
+
+@contextmanager
+def timed(stage):
+    t0 = time.perf_counter()
+    try: yield
+    finally: METRICS.observe("stage_seconds", time.perf_counter() - t0, stage=stage)
+
+class Cancelled(Exception):
+    pass
+
+# 요청 값이 잘못됨 → HTTP 400 JSON 오류로 응답
+class BadRequest(ValueError):
+    pass
+
+# 요청 본문·쿼리 문자열의 숫자 값. 비어 있으면 기본값 (parse_qs의 목록 값은 첫 항목)
+def _num(q, key, default, kind=int):
+    v = q.get(key)
+    if isinstance(v, list): v = v[0] if v else None
+    if not v: return default
+    try: return kind(v)
+    except (TypeError, ValueError): raise BadRequest(f"잘못된 값: {key}={v!r}") from None
+
+# 요청 본문의 문자열 값 (앞뒤 공백 제거, 없거나 null이면 기본값)
+def _text(body, key, default=""):
+    v = body.get(key)
+    if v is None: return default
+    if not isinstance(v, str): raise BadRequest(f"잘못된 값: {key}={v!r} (문자열이어야 함)")
+    return v.strip()
+
+# 요청 본문의 파일 목록 — 문자열 path(와 fields가 있으면 그 값도 문자열)를 가진 객체의 목록
+def _file_list(body, key, *fields):
+    v = body.get(key)
+    if v is None: return []
+    if not isinstance(v, list): raise BadRequest(f"잘못된 값: {key} (목록이어야 함)")
+    for k, it in enumerate(v):
+        if not (isinstance(it, dict) and isinstance(it.get("path"), str)
+                and all(isinstance(it.get(f, ""), str) for f in fields)):
+            raise BadRequest(f"잘못된 값: {key}[{k}] (객체이고 {', '.join(('path',) + fields)} 값은 문자열이어야 함)")
+    return v
+
+# 변환기 실행은 모두 여기로 → 소요 시간, 종료코드, 시간 초과 기록. cancel(Event)이 켜지면 프로세스를 즉시 종료
+def run_converter(cmd, timeout, cancel=None, text=False):
+    t0 = time.perf_counter(); deadline = time.monotonic() + timeout
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=text)
+    try:
+        while True:
+            try:
+                out, err = proc.communicate(timeout=0.5); break
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    proc.kill(); proc.communicate()
+                    METRICS.inc("converter_cancel_total", conv=CONV_TYPE); raise Cancelled("작업 취소됨")
+                if time.monotonic() > deadline:
+                    proc.kill(); proc.communicate()
+                    METRICS.inc("converter_timeout_total", conv=CONV_TYPE); raise subprocess.TimeoutExpired(cmd, timeout)
+        METRICS.inc("converter_exit_total", conv=CONV_TYPE, code=proc.returncode)
+        return subprocess.CompletedProcess(cmd, proc.returncode, out, err)
+    finally:
+        METRICS.observe("stage_seconds", time.perf_counter() - t0, stage="convert")
+
 # ── DXF 파싱 ─────────────────────────────────────────────
-def _read_dxf(path):
-    for enc in ("utf-8", "cp949", "euc-kr", "latin-1"):
+# 파일을 메모리 매핑해 바이트 단위로 ENTITIES 섹션만 훑음 → 파일 전체 디코딩·복사 없음, 메모리 사용량 일정
+TEXT_ENTS = (b"TEXT",b"MTEXT",b"ATTRIB",b"ATTDEF")
+KEEP_CODES = (1, 8, 10, 20, 40)   # 사용하는 그룹코드만 보관, 디코딩은 1/8만
+CHUNK = 1 << 20
+SNIFF = 64 << 10
+_ENT_SEC = re.compile(rb"\n[ \t]*2[ \t]*\r?\n[ \t]*ENTITIES[ \t]*\r?\n")
+_ACADVER = re.compile(rb"\$ACADVER[ \t]*\r?\n[ \t]*1[ \t]*\r?\n[ \t]*(AC\d+)")
+_CODEPAGE = re.compile(rb"\$DWGCODEPAGE[ \t]*\r?\n[ \t]*3[ \t]*\r?\n[ \t]*(?:ANSI|DOS)_?(\d+)", re.I)
+_EXT = re.compile(rb"\$EXT(MIN|MAX)[ \t]*\r?\n[ \t]*10[ \t]*\r?\n[ \t]*(\S+)[ \t]*\r?\n[ \t]*20[ \t]*\r?\n[ \t]*(\S+)")
+
+# R2007(AC1021) 이상은 UTF-8, 그 이전은 HEADER의 $DWGCODEPAGE가 다바이트(한·중·일)면 그대로 사용
+# ANSI_1252 같은 1바이트 코드페이지는 어떤 바이트열도 디코딩되는데 한글 도면에 기본값으로 붙어 있는 경우가 많음
+# → 기존 순서대로 ENTITIES 앞부분을 UTF-8, cp949로 엄격하게 디코딩해 보고 둘 다 안 될 때만 선언값 사용
+_MULTIBYTE_CP = {"cp932","cp936","cp949","cp950","cp1361"}
+
+def dxf_encoding(mm, ent_pos=0):
+    head = mm[:SNIFF]
+    m = _ACADVER.search(head)
+    if m and m.group(1) >= b"AC1021": return "utf-8"
+    declared = None
+    m = _CODEPAGE.search(head)
+    if m:
+        enc = "cp" + m.group(1).decode()
+        try: codecs.lookup(enc)
+        except LookupError: enc = None
+        if enc in _MULTIBYTE_CP: return enc
+        declared = enc
+    sample = mm[ent_pos:ent_pos + SNIFF]
+    for enc in ("utf-8", "cp949"):
         try:
-            return open(path, encoding=enc, errors="strict").read()
-        except (UnicodeDecodeError, LookupError):
+            sample.decode(enc); return enc
+        except UnicodeDecodeError as e:
+            if len(sample) == SNIFF and e.start >= SNIFF - 4: return enc   # 표본 끝에서 잘린 다바이트 문자
+    return declared or "cp949"
+
+def _decode(raw, enc="utf-8"):
+    for e in (enc, "utf-8", "cp949", "euc-kr"):
+        try:
+            return raw.decode(e)
+        except UnicodeDecodeError:
             continue
-    return open(path, encoding="latin-1", errors="replace").read()
+    return raw.decode("latin-1")
+
+_decode_sec = [0.0]   # 현재 작업의 디코딩 누적 시간 (index_task가 초기화)
+
+# ENTITIES 섹션의 TEXT/MTEXT/ATTRIB/ATTDEF 레코드 → (종류, {그룹코드: 값}), ENDSEC에서 중단
+# 값은 bytes 그대로, 1(텍스트)·8(레이어)만 파일 인코딩으로 디코딩해 str
+def iter_text_entities(dxf_path):
+    with open(dxf_path, "rb") as f:
+        try: mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: return   # 빈 파일
+    with mm:
+        m = _ENT_SEC.search(mm)
+        if not m: return
+        enc = dxf_encoding(mm, m.end()); layers = {}
+        mm.seek(m.end()); readline = mm.readline
+        ent = None; ed = {}
+
+        def rec():
+            t0 = time.perf_counter()
+            if 1 in ed: ed[1] = _decode(ed[1], enc)
+            if 8 in ed:
+                raw = ed[8]; l = layers.get(raw)
+                if l is None: l = layers[raw] = _decode(raw, enc)
+                ed[8] = l
+            _decode_sec[0] += time.perf_counter() - t0
+            return ent.decode("ascii"), ed
+
+        while True:
+            c = readline(); v = readline()
+            if not v: break
+            try: code = int(c)
+            except ValueError: continue
+            if code == 0:
+                if ent: yield rec()
+                ent = v.strip().upper(); ed = {}
+                if ent == b"ENDSEC": return
+                if ent not in TEXT_ENTS: ent = None
+            elif ent and code in KEEP_CODES:
+                ed[code] = v.strip()
+        if ent: yield rec()
 
 def _strip_mtext(raw):
     t = re.sub(r"\\[A-Za-z][^;]*;", "", raw)
     t = re.sub(r"[{}]", "", t)
     return re.sub(r"\s+", " ", t).strip()
 
-def get_layers(dxf_path):
-    layers = set()
+# HEADER의 $EXTMIN/$EXTMAX → 도면 범위 (x0, y0, x1, y1). 없거나 초기값(±1e20)이면 None
+def dxf_extents(dxf_path):
+    with open(dxf_path, "rb") as f: head = f.read(SNIFF)
+    ext = {}
+    for m in _EXT.finditer(head):
+        try: ext[m.group(1)] = (float(m.group(2)), float(m.group(3)))
+        except ValueError: pass
+    if len(ext) < 2: return None
+    (x0, y0), (x1, y1) = ext[b"MIN"], ext[b"MAX"]
+    return (x0, y0, x1, y1) if x0 < x1 and y0 < y1 and max(map(abs, (x0, y0, x1, y1))) < 1e19 else None
+
+# ── 텍스트 저장소 / 공간 색인 ─────────────────────────────
+# 파일당 텍스트를 튜플 리스트 대신 배열 몇 개(레이어 번호, x, y, 높이, 문자열 시작 위치)에 보관
+# → 객체 수·메모리가 적고 파싱 프로세스에서 넘겨받는 pickle도 작음. 문자열은 하나로 이어 붙여 둠
+# 레이어별 번호 목록과 영역 질의용 격자 색인은 처음 쓸 때 만들어 캐시 (pickle 대상 아님)
+class TextStore:
+    def __init__(self, rows=(), extents=None):
+        self.layers = []; ids = {}
+        self.lay = array("I"); self.x = array("d"); self.y = array("d"); self.h = array("d")
+        self.off = array("I", [0]); parts = []; n = 0
+        for l, t, x, y, h in rows:
+            k = ids.get(l)
+            if k is None: k = ids[l] = len(self.layers); self.layers.append(l)
+            self.lay.append(k); self.x.append(x); self.y.append(y); self.h.append(h)
+            parts.append(t); n += len(t); self.off.append(n)
+        self.buf = "".join(parts)
+        self.extents = extents or self.bounds(range(len(self.lay)))
+        self._memo = {}
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != "_memo"}
+
+    def __setstate__(self, st):
+        self.__dict__.update(st); self._memo = {}
+
+    def __len__(self):
+        return len(self.lay)
+
+    # 배열 + 문자열 + 번호 목록·격자 색인(항목당 약 40바이트) 대략치
+    def nbytes(self):
+        n = len(self.lay)
+        return 200 + 2 * len(self.buf) + 4 * (len(self.off) + n) + 24 * n + 40 * n + 80 * len(self.layers)
+
+    def text(self, i):
+        return self.buf[self.off[i]:self.off[i + 1]]
+
+    def layer_ids(self, layer):
+        key = ("ids", layer.upper()); ids = self._memo.get(key)
+        if ids is None:
+            ks = {k for k, l in enumerate(self.layers) if l.upper() == key[1]}
+            ids = self._memo[key] = [i for i, v in enumerate(self.lay) if v in ks] if ks else []
+        return ids
+
+    def layer_counts(self):
+        return Counter({self.layers[k]: c for k, c in Counter(self.lay).items()})
+
+    def bounds(self, ids):
+        xs = [self.x[i] for i in ids]; ys = [self.y[i] for i in ids]
+        return (min(xs), min(ys), max(xs), max(ys)) if xs else (0.0, 0.0, 0.0, 0.0)
+
+    # 레이어 텍스트를 칸당 평균 4개 정도의 균일 격자에 배치 → {(열, 행): [번호…]}
+    def _grid(self, layer):
+        key = ("grid", layer.upper()); g = self._memo.get(key)
+        if g is None:
+            ids = self.layer_ids(layer); x0, y0, x1, y1 = self.bounds(ids)
+            side = max(1, int((len(ids) / 4) ** 0.5))
+            cw, ch = (x1 - x0) / side or 1.0, (y1 - y0) / side or 1.0
+            cells = {}
+            for i in ids:
+                cells.setdefault((min(int((self.x[i] - x0) / cw), side - 1),
+                                  min(int((self.y[i] - y0) / ch), side - 1)), []).append(i)
+            g = self._memo[key] = (x0, y0, cw, ch, side, cells)
+        return g
+
+    # 삽입점이 사각형 (x0, y0, x1, y1) 안에 있는 레이어 텍스트 번호 → 겹치는 칸만 확인
+    def query(self, layer, x0, y0, x1, y1):
+        gx, gy, cw, ch, side, cells = self._grid(layer)
+        # 칸 번호는 _grid와 같은 식으로 계산하고 양쪽 모두 [0, side-1]로 제한 → 최대 경계 위의 점도 포함
+        cell = lambda v, o, w: min(side - 1, max(0, int((v - o) / w)))
+        c0, c1 = cell(x0, gx, cw), cell(x1, gx, cw)
+        r0, r1 = cell(y0, gy, ch), cell(y1, gy, ch)
+        out = []
+        for c in range(c0, c1 + 1):
+            for r in range(r0, r1 + 1):
+                out += [i for i in cells.get((c, r), ()) if x0 <= self.x[i] <= x1 and y0 <= self.y[i] <= y1]
+        return sorted(out)
+
+# 모든 레이어의 텍스트를 한 번에 수집 → TextStore. 레이어 필터링은 호출 측에서
+def text_index(dxf_path):
+    rows = []
     try:
-        lines = _read_dxf(dxf_path).splitlines()
-        in_e = False; i = 0
-        while i < len(lines) - 1:
-            try: code = int(lines[i].strip())
-            except ValueError: i += 2; continue
-            val = lines[i+1].strip(); i += 2
-            if code == 0:
-                in_e = val.upper() in ("TEXT","MTEXT","ATTRIB","ATTDEF")
-            if in_e and code == 8:
-                layers.add(val)
+        for ent, ed in iter_text_entities(dxf_path):
+            if 1 not in ed: continue
+            t = _strip_mtext(ed[1]) if ent == "MTEXT" else ed[1].strip()
+            rows.append((ed.get(8, ""), t, float(ed.get(10, 0)), float(ed.get(20, 0)), float(ed.get(40, 0))))
     except Exception:
         pass
-    return sorted(layers)
+    try: ext = dxf_extents(dxf_path)
+    except OSError: ext = None
+    return TextStore(rows, ext)
+
+# 파싱 프로세스에서 실행: 인덱스 + 측정값(소요 시간, 디코딩 시간, 바이트, 엔티티 수)
+def index_task(dxf_path):
+    _decode_sec[0] = 0.0; t0 = time.perf_counter()
+    store = text_index(dxf_path)
+    return store, {"sec":time.perf_counter() - t0, "decode":_decode_sec[0],
+                   "bytes":os.path.getsize(dxf_path), "entities":len(store)}
+
+def layer_texts(store, layer):
+    return [(store.text(i), store.x[i], store.y[i]) for i in store.layer_ids(layer)]
+
+def get_layers(dxf_path):
+    return sorted(set(text_index(dxf_path).layers))
 
 def extract_texts(dxf_path, layer):
-    results = []
-    try:
-        lines = _read_dxf(dxf_path).splitlines()
-        i = 0; ent = None; ed = {}
-
-        def flush():
-            if ent in ("TEXT","ATTRIB","ATTDEF") and "1" in ed:
-                if ed.get("8","").upper() == layer.upper():
-                    results.append((ed["1"].strip(), float(ed.get("10",0)), float(ed.get("20",0))))
-            elif ent == "MTEXT" and "1" in ed:
-                if ed.get("8","").upper() == layer.upper():
-                    results.append((_strip_mtext(ed["1"]), float(ed.get("10",0)), float(ed.get("20",0))))
-
-        while i < len(lines) - 1:
-            try: code = int(lines[i].strip())
-            except ValueError: i += 2; continue
-            val = lines[i+1].strip(); i += 2
-            if code == 0: flush(); ent = val.upper(); ed = {}
-            elif ent: ed[str(code)] = val
-        flush()
-    except Exception:
-        pass
-    return results
+    return layer_texts(text_index(dxf_path), layer)
+
+# ── 제목 선택 전략 ───────────────────────────────────────
+# leftmost   : 가장 왼쪽 텍스트 (기존 동작, 기본값)
+# largest    : 글자 높이가 가장 큰 텍스트
+# titleblock : 표제란 영역(도면 범위 대비 비율, 기본 우측 하단) 안에서 가장 큰 텍스트, 없으면 leftmost
+TITLE_STRATEGY = os.environ.get("CAD_RENAMER_TITLE", "leftmost")
+TITLE_BLOCK = tuple(float(v) for v in os.environ.get("CAD_RENAMER_TITLE_BLOCK", "0.5,0,1,0.3").split(","))
+_NUMERIC = re.compile(r"[\d\s.\-+/\\,()]+")
+
+def _title_cands(store, ids):
+    texts = [(i, store.text(i)) for i in ids]
+    cands = [i for i, t in texts if 2 <= len(t) <= 100 and not _NUMERIC.fullmatch(t)]
+    return cands or [i for i, t in texts if t.strip()]
+
+def _title_leftmost(store, layer):
+    cands = _title_cands(store, store.layer_ids(layer))
+    return min(cands, key=lambda i: store.x[i]) if cands else None
+
+def _title_largest(store, layer):
+    cands = _title_cands(store, store.layer_ids(layer))
+    return min(cands, key=lambda i: (-store.h[i], store.x[i])) if cands else None
 
-def pick_title(texts):
-    cands = [(t,x,y) for t,x,y in texts
-             if 2 <= len(t) <= 100
-             and not re.fullmatch(r"[\d\s.\-+/\\,()]+", t)]
-    if not cands: cands = [(t,x,y) for t,x,y in texts if t.strip()]
-    if not cands: return None
-    cands.sort(key=lambda v: v[1])
-    return cands[0][0]
+def _title_block(store, layer):
+    ex0, ey0, ex1, ey1 = store.extents; fx0, fy0, fx1, fy1 = TITLE_BLOCK
+    w, h = ex1 - ex0, ey1 - ey0
+    cands = _title_cands(store, store.query(layer, ex0 + fx0 * w, ey0 + fy0 * h, ex0 + fx1 * w, ey0 + fy1 * h))
+    if not cands: return _title_leftmost(store, layer)
+    return min(cands, key=lambda i: (-store.h[i], store.x[i]))
+
+TITLE_STRATEGIES = {"leftmost": _title_leftmost, "largest": _title_largest, "titleblock": _title_block}
+
+def pick_title(store, layer, strategy=None):
+    i = TITLE_STRATEGIES[strategy or TITLE_STRATEGY](store, layer)
+    return None if i is None else store.text(i)
 
 def sanitize(name):
     name = re.sub(r'[\\/:*?"<>|\r\n\t]', "_", name.strip())
@@ -100,22 +396,20 @@ def sanitize(name):
     return name[:120] or "unnamed"
 
 # ── DWG → DXF 변환 ───────────────────────────────────────
-def dwg_to_dxf(dwg_path, out_dir):
+def dwg_to_dxf(dwg_path, out_dir, cancel=None):
     stem = Path(dwg_path).stem
     dxf  = Path(out_dir) / (stem + ".dxf")
     if CONV_TYPE == "oda":
         try:
-            subprocess.run([CONV_PATH, str(Path(dwg_path).parent), out_dir,
-                            "ACAD2018", "DXF", "0", "1", stem],
-                           capture_output=True, timeout=60)
+            run_converter([CONV_PATH, str(Path(dwg_path).parent), out_dir,
+                           "ACAD2018", "DXF", "0", "1", stem], timeout=60, cancel=cancel)
             if dxf.exists(): return str(dxf), None
         except Exception as e:
             return None, str(e)
     if CONV_TYPE == "lo":
         try:
-            r = subprocess.run([CONV_PATH, "--headless", "--convert-to", "dxf",
-                                "--outdir", out_dir, str(dwg_path)],
-                               capture_output=True, text=True, timeout=90)
+            r = run_converter([CONV_PATH, "--headless", "--convert-to", "dxf",
+                               "--outdir", out_dir, str(dwg_path)], timeout=90, cancel=cancel, text=True)
             if dxf.exists(): return str(dxf), None
             return None, r.stderr or "LibreOffice 변환 실패"
         except subprocess.TimeoutExpired:
@@ -124,91 +418,1081 @@ def dwg_to_dxf(dwg_path, out_dir):
             return None, str(e)
     return None, "DWG 변환기 없음 (ODA File Converter 또는 LibreOffice 설치 필요)"
 
+# ── 변환 결과 캐시 (원본 경로·크기·수정시각 기준, LRU) ─────
+# 한 번 변환한 DWG는 재시작 후에도 다시 변환하지 않음. 사용 시 mtime 갱신 → 오래된 것부터 삭제
+CACHE_DIR    = Path(os.environ.get("CAD_RENAMER_CACHE") or
+                    Path(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()) / "cad_renamer" / "dxf_cache")
+CACHE_MAX_MB = int(os.environ.get("CAD_RENAMER_CACHE_MB", "4096"))
+CACHE_HASH   = os.environ.get("CAD_RENAMER_CACHE_HASH", "") == "1"   # 내용 해시까지 비교 (느리지만 안전)
+
+_cache_lock = threading.Lock()
+_cache_size = None
+_key_locks = {}
+
+def _cache_key(path):
+    st = os.stat(path)
+    h = hashlib.sha1(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode())
+    if CACHE_HASH:
+        with open(path, "rb") as f:
+            for b in iter(lambda: f.read(CHUNK), b""): h.update(b)
+    return h.hexdigest()
+
+def _cache_get(key):
+    p = CACHE_DIR / (key + ".dxf")
+    try: os.utime(p)
+    except OSError: METRICS.inc("cache_total", cache="dxf", result="miss"); return None
+    METRICS.inc("cache_total", cache="dxf", result="hit")
+    return str(p)
+
+def _cache_put(key, dxf):
+    global _cache_size
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    dst = CACHE_DIR / (key + ".dxf")
+    tmp = CACHE_DIR / f"{key}.{threading.get_ident()}.tmp"
+    shutil.move(dxf, tmp); os.replace(tmp, dst)
+    with _cache_lock:
+        if _cache_size is None:
+            _cache_size = sum(e.stat().st_size for e in os.scandir(CACHE_DIR) if e.name.endswith(".dxf"))
+        else:
+            _cache_size += dst.stat().st_size
+        if _cache_size > CACHE_MAX_MB << 20: _cache_evict()
+    return str(dst)
+
+def _cache_evict():
+    global _cache_size
+    ents = sorted((e.stat().st_mtime, e.stat().st_size, e.path)
+                  for e in os.scandir(CACHE_DIR) if e.name.endswith(".dxf"))
+    _cache_size = sum(s for _, s, _ in ents)
+    for _, size, p in ents[:-1]:
+        if _cache_size <= CACHE_MAX_MB << 20: break
+        try: os.remove(p); _cache_size -= size
+        except OSError: pass
+
+# src: 미리 읽어 둔 로컬 사본 (캐시 키는 항상 원본 경로 기준)
+def to_dxf(path, cancel=None, src=None):
+    if Path(path).suffix.lower() != ".dwg": return src or path, None
+    try: key = _cache_key(path)
+    except OSError as e: return None, str(e)
+    with _cache_lock: lk = _key_locks.setdefault(key, threading.Lock())
+    with lk:
+        hit = _cache_get(key)
+        if hit: return hit, None
+        tmpdir = None
+        try:
+            tmpdir = tempfile.mkdtemp()
+            dxf, err = dwg_to_dxf(src or path, tmpdir, cancel)
+            if not dxf: return None, err
+            return _cache_put(key, dxf), None
+        except OSError as e:   # 임시 폴더·캐시 쓰기 실패(디스크 부족 등)도 이 파일의 오류로
+            return None, str(e)
+        finally:
+            if tmpdir: shutil.rmtree(tmpdir, ignore_errors=True)
+
+# ── ODA 일괄 변환 (폴더 단위 1회 실행) ──────────────────
+# 파일마다 ODA를 띄우면 실행·폴더 탐색 비용이 파일 수만큼 반복됨 → 원본 폴더별로 묶어 한 번에 변환
+ODA_BATCH = 200   # 스테이징 변환 1회당 최대 파일 수
+
+def _oda_err(out_dir, src):
+    e = Path(out_dir) / (Path(src).name + ".err")
+    try: return e.read_text(errors="replace").strip()[:300] or "ODA 변환 실패"
+    except OSError: return "ODA 변환 실패"
+
+def _oda_batch(in_dir, out_dir, n, cancel=None):
+    try:
+        run_converter([CONV_PATH, in_dir, out_dir, "ACAD2018", "DXF", "0", "1", "*.DWG"],
+                      timeout=60 + 20 * n, cancel=cancel)
+        return None
+    except subprocess.TimeoutExpired:
+        return "변환 시간 초과"
+    except Exception as e:
+        return str(e)
+
+# 실패한 파일은 {경로: 오류}로 반환 — 나머지 파일은 그대로 변환
+def _stage(paths, in_dir):
+    bad = {}
+    for p in paths:
+        dst = os.path.join(in_dir, os.path.basename(p))
+        try: os.link(p, dst)
+        except OSError:
+            try: shutil.copyfile(p, dst)
+            except OSError as e: bad[p] = str(e)
+    return bad
+
+# 폴더의 DWG 중 캐시에 없는 파일 수
+def _uncached(src_dir, names):
+    n = 0
+    for f in names:
+        try: n += not (CACHE_DIR / (_cache_key(os.path.join(src_dir, f)) + ".dxf")).exists()
+        except OSError: pass
+    return n
+
+# paths 순서대로 (dxf, err) — 캐시 적중은 그대로, 나머지 DWG는 폴더별로 묶어 변환
+def to_dxf_many(paths, cancel=None, srcs=None):
+    srcs = srcs or [None] * len(paths)
+    out = [None] * len(paths); miss = {}
+    for i, p in enumerate(paths):
+        if CONV_TYPE != "oda" or Path(p).suffix.lower() != ".dwg":
+            continue
+        try: key = _cache_key(p)
+        except OSError as e: out[i] = (None, str(e)); continue
+        hit = _cache_get(key)
+        if hit: out[i] = (hit, None)
+        else: miss.setdefault(str(Path(p).parent), []).append((i, p, key, srcs[i]))
+    for src_dir, group in miss.items():
+        for k in range(0, len(group), ODA_BATCH):
+            part = group[k:k + ODA_BATCH]
+            try:
+                for i, r in _convert_group(src_dir, part, cancel): out[i] = r
+            except OSError as e:   # 임시 폴더를 못 만드는 등 묶음 전체 실패 → 남은 파일마다 오류
+                for i, *_ in part: out[i] = out[i] or (None, str(e))
+    return [r or to_dxf(p, cancel, s) for r, p, s in zip(out, paths, srcs)]
+
+def _convert_group(src_dir, group, cancel=None):
+    with _cache_lock:
+        locks = [_key_locks.setdefault(key, threading.Lock()) for key in sorted({g[2] for g in group})]
+    for lk in locks: lk.acquire()
+    tmp = None
+    try:
+        tmp = tempfile.mkdtemp(); todo = []
+        for i, p, key, src in group:
+            hit = _cache_get(key)
+            if hit: yield i, (hit, None)
+            else: todo.append((i, p, key, src))
+        if not todo: return
+        out_dir = os.path.join(tmp, "out"); os.mkdir(out_dir)
+        try: dwgs = [f for f in os.listdir(src_dir) if f.lower().endswith(".dwg")]
+        except OSError: dwgs = []
+        total = len(dwgs)
+        # 폴더 대부분이 미변환이고 미변환 DWG가 모두 이 묶음에 있을 때만 복사 없이 폴더 통째로
+        # (같은 폴더의 다른 묶음이 동시에 변환 중이면 그 파일까지 두 번 변환하게 되므로 스테이징)
+        # 미리 읽은 로컬 사본이 있으면 원본 폴더를 다시 읽지 않음
+        if (len(todo) * 2 >= total and not any(src for *_, src in todo)
+                and _uncached(src_dir, dwgs) <= len(todo)):
+            in_dir = src_dir
+        else:
+            in_dir = os.path.join(tmp, "in"); os.mkdir(in_dir)
+            bad = _stage([src or p for _, p, _, src in todo], in_dir)
+            for i, p, _, src in todo:
+                if (src or p) in bad: yield i, (None, bad[src or p])
+            todo = [t for t in todo if (t[3] or t[1]) not in bad]
+            if not todo: return
+        err = _oda_batch(in_dir, out_dir, len(todo) if in_dir != src_dir else total, cancel)
+        if cancel is not None and cancel.is_set():   # 중단된 변환의 출력은 잘렸을 수 있어 캐시에 넣지 않음
+            for i, *_ in todo: yield i, (None, "작업 취소됨")
+            return
+        for i, p, key, _ in todo:
+            dxf = os.path.join(out_dir, Path(p).stem + ".dxf")
+            if not os.path.exists(dxf): r = (None, err or _oda_err(out_dir, p))
+            else:
+                try: r = (_cache_put(key, dxf), None)
+                except OSError as e: r = (None, str(e))   # 캐시 쓰기 실패는 이 파일만 오류로
+            yield i, r
+        if in_dir == src_dir:   # 함께 변환된 나머지 파일도 캐시에 보관 (원본 이름은 X.DWG처럼 대소문자 그대로)
+            done = {Path(p).stem.lower() for _, p, _, _ in todo}
+            names = {os.path.splitext(f)[0].lower(): f for f in dwgs}
+            for f in os.listdir(out_dir):
+                stem, ext = os.path.splitext(f)
+                if ext.lower() != ".dxf" or stem.lower() in done or stem.lower() not in names: continue
+                try: _cache_put(_cache_key(os.path.join(src_dir, names[stem.lower()])), os.path.join(out_dir, f))
+                except OSError: pass
+    finally:
+        if tmp: shutil.rmtree(tmp, ignore_errors=True)
+        for lk in locks: lk.release()
+
+# ── 미리 읽기 (네트워크 공유 폴더 → 로컬 스테이징) ────────
+# SMB 등 네트워크 경로의 도면을 변환·파싱 순서보다 앞서 큰 단위 순차 읽기로 로컬에 복사해 두어
+# 네트워크 대기와 CPU 작업이 겹치게 함. 스테이징 용량은 STAGE_MB로 제한되고, 다 쓴 사본은 바로 삭제
+# 아직 복사 전인 파일을 변환 단계가 먼저 요청하면 원본을 직접 읽음 (용량 부족으로 멈추지 않음)
+PREFETCH         = os.environ.get("CAD_RENAMER_PREFETCH", "auto")   # auto: 네트워크 경로만, on, off
+PREFETCH_WORKERS = 2
+STAGE_MB         = int(os.environ.get("CAD_RENAMER_STAGE_MB", "512"))
+STAGE_ROOT       = CACHE_DIR.parent / "stage"
+COPY_BUF         = 8 << 20
+_NET_FS = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "9p")
+
+def _mounts():
+    try:
+        with open("/proc/mounts") as f:
+            return sorted(((l.split()[1], l.split()[2]) for l in f), key=lambda m: -len(m[0]))
+    except OSError:
+        return []
+
+_remote_memo = {}
+
+def _is_remote(path):
+    p = os.path.abspath(path)
+    if p.startswith(("\\\\", "//")): return True
+    root = os.path.splitdrive(p)[0] if os.name == "nt" else os.path.dirname(p)
+    if root not in _remote_memo:
+        if os.name == "nt":
+            import ctypes
+            _remote_memo[root] = ctypes.windll.kernel32.GetDriveTypeW(root + "\\") == 4   # DRIVE_REMOTE
+        else:
+            fs = next((t for m, t in _mounts() if root == m or root.startswith(m.rstrip("/") + "/")), "")
+            _remote_memo[root] = fs in _NET_FS
+    return _remote_memo[root]
+
+def _copy_seq(src, dst, cancel=None):
+    buf = bytearray(COPY_BUF); mv = memoryview(buf)
+    with open(src, "rb", buffering=0) as f, open(dst, "wb") as o:
+        while True:
+            if cancel is not None and cancel.is_set(): raise Cancelled("작업 취소됨")
+            n = f.readinto(buf)
+            if not n: break
+            o.write(mv[:n])
+
+class Prefetcher:
+    def __init__(self, paths, cancel=None, max_bytes=None):
+        self.paths = paths; self.cancel = cancel; self.max_bytes = STAGE_MB << 20 if max_bytes is None else max_bytes
+        STAGE_ROOT.mkdir(parents=True, exist_ok=True)
+        for e in os.scandir(STAGE_ROOT):   # 비정상 종료로 남은 스테이징 폴더 정리
+            if e.is_dir() and time.time() - e.stat().st_mtime > 3600: shutil.rmtree(e.path, ignore_errors=True)
+        self.dir = tempfile.mkdtemp(dir=STAGE_ROOT)
+        self.cond = threading.Condition()
+        self.next = 0; self.used = 0; self.closed = False
+        self.claimed = set(); self.copying = set(); self.ready = {}   # i → (로컬 사본 또는 None, 크기)
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(PREFETCH_WORKERS)]
+        for t in self.threads: t.start()
+
+    def _claim(self):
+        with self.cond:
+            while self.next < len(self.paths) and self.next in self.claimed: self.next += 1
+            if self.closed or self.next >= len(self.paths): return None
+            i = self.next; self.claimed.add(i); self.next += 1
+            return i
+
+    def _work(self):
+        while (i := self._claim()) is not None:
+            p = self.paths[i]; local = None; size = 0
+            try:
+                if _is_remote(p) and not (p.lower().endswith(".dwg") and
+                                          (CACHE_DIR / (_cache_key(p) + ".dxf")).exists()):
+                    size = os.path.getsize(p)
+                    with self.cond:
+                        # 용량을 기다리는 동안 변환 단계가 이 파일을 가져가면(get) 복사하지 않고 다음 파일로
+                        while (not self.closed and i not in self.ready
+                               and self.used and self.used + size > self.max_bytes): self.cond.wait()
+                        if self.closed or i in self.ready: continue
+                        self.copying.add(i); self.used += size
+                    d = os.path.join(self.dir, str(i)); os.mkdir(d)
+                    local = os.path.join(d, os.path.basename(p))
+                    with timed("prefetch"): _copy_seq(p, local, self.cancel)
+            except Exception:
+                local = None
+            with self.cond:
+                if local is None and size: self.used -= size; size = 0
+                self.copying.discard(i); self.ready[i] = (local, size); self.cond.notify_all()
+
+    # 변환 단계에서 호출: 로컬 사본 경로, 없으면 None(원본 직접 사용)
+    # 복사가 시작되지 않은 파일(미할당 또는 용량 대기 중)은 기다리지 않고 원본을 쓰도록 넘겨받음
+    # → 한 묶음의 사본이 STAGE_MB를 넘어도 멈추지 않음. 복사 중인 파일만 끝날 때까지 대기
+    def get(self, i):
+        t0 = time.perf_counter()
+        with self.cond:
+            if i not in self.ready and i not in self.copying:
+                self.claimed.add(i); self.ready[i] = (None, 0); self.cond.notify_all(); return None
+            while i not in self.ready and not self.closed: self.cond.wait()
+        METRICS.observe("stage_seconds", time.perf_counter() - t0, stage="prefetch_wait")
+        return self.ready.get(i, (None, 0))[0]
+
+    def release(self, i):
+        with self.cond:
+            local, size = self.ready.get(i, (None, 0))
+            if not local: return
+            self.ready[i] = (None, 0); self.used -= size; self.cond.notify_all()
+        shutil.rmtree(os.path.dirname(local), ignore_errors=True)
+
+    def close(self):
+        with self.cond: self.closed = True; self.cond.notify_all()
+        for t in self.threads: t.join(timeout=5)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def _want_prefetch(paths):
+    if PREFETCH == "on": return True
+    if PREFETCH != "auto" or not paths: return False
+    return any(_is_remote(p) for p in paths)
+
+# ── 병렬 처리 엔진 ───────────────────────────────────────
+# 변환(외부 프로세스, 무거움)은 소수 스레드로 제한, DXF 파싱(CPU)은 프로세스 풀에서 코어 수만큼
+CONV_WORKERS  = int(os.environ.get("CAD_RENAMER_CONV_WORKERS", "2"))
+PARSE_WORKERS = int(os.environ.get("CAD_RENAMER_PARSE_WORKERS", "0")) or (os.cpu_count() or 2)
+
+_pool_lock = threading.Lock()
+_conv_pool = _parse_pool = None
+
+def _pools():
+    global _conv_pool, _parse_pool
+    with _pool_lock:
+        if _conv_pool is None:
+            _conv_pool  = ThreadPoolExecutor(CONV_WORKERS, thread_name_prefix="conv")
+            # fork는 변환 스레드의 subprocess 파이프를 물려받아 교착 가능 → Windows와 같은 spawn 사용
+            _parse_pool = ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _conv_pool, _parse_pool
+
+def _conv_chunk(paths, idx, cancel=None, pre=None):
+    if cancel is not None and cancel.is_set(): return [(i, None, "작업 취소됨") for i in idx]
+    srcs = [pre.get(i) for i in idx] if pre else None
+    try: res = to_dxf_many([paths[i] for i in idx], cancel, srcs)
+    except Exception as e: res = [(None, str(e) or "변환 실패")] * len(idx)   # 한 묶음 실패가 전체 작업을 끝내지 않도록
+    out = [(i, *r) for i, r in zip(idx, res)]
+    if pre:   # DWG 사본은 변환이 끝나면 불필요 (DXF 사본은 파싱 후 해제)
+        for (i, dxf, _), src in zip(out, srcs):
+            if src and dxf != src: pre.release(i)
+    return out
+
+# 완료되는 순서대로 (i, err, task(dxf, *args)) 반환 — 호출 측에서 i로 원래 순서 복원
+# 미리 읽기 → 변환(스레드) → 파싱(프로세스) 단계를 겹쳐 실행. 단계 사이 대기열은 작업자 수의 2배로 제한해
+# 앞 단계가 너무 앞서 나가 메모리·디스크를 쌓지 않게 함
+# cancel(Event)이 켜지면 대기 작업을 버리고 실행 중인 변환기 프로세스도 종료
+# stop이 켜지면 새 작업만 멈추고 반환 — 실행 중인 변환은 끝까지 진행해 캐시에 남김 (다음 요청에서 재사용)
+# step: ODA 변환 1회당 파일 수 (기본은 작업자당 4묶음이 되도록, 최대 ODA_BATCH)
+def pipeline(paths, task, *args, cancel=None, stop=None, step=None):
+    conv, parse = _pools()
+    if CONV_TYPE != "oda": step = 1
+    elif not step: step = max(1, min(ODA_BATCH, -(-len(paths) // (CONV_WORKERS * 4))))
+    starts = deque(range(0, len(paths), step)); ready = deque()
+    pre = Prefetcher(paths, cancel) if _want_prefetch(paths) else None
+    pending = {}; nconv = nparse = 0
+    try:
+        while True:
+            while ready and nparse < PARSE_WORKERS * 2:
+                i, dxf = ready.popleft(); pending[parse.submit(task, dxf, *args)] = i; nparse += 1
+            while starts and nconv < CONV_WORKERS * 2 and len(ready) < PARSE_WORKERS * 2:
+                k = starts.popleft(); nconv += 1
+                pending[conv.submit(_conv_chunk, paths, range(k, min(k + step, len(paths))), cancel, pre)] = None
+            if not pending: break
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            if (cancel is not None and cancel.is_set()) or (stop is not None and stop.is_set()): return
+            for f in done:
+                i = pending.pop(f)
+                if i is not None:
+                    nparse -= 1
+                    if pre: pre.release(i)
+                    try: yield i, None, f.result()
+                    except Exception as e: yield i, str(e) or "파싱 실패", None
+                    continue
+                nconv -= 1
+                for i, dxf, err in f.result():
+                    if dxf and os.path.exists(dxf): ready.append((i, dxf)); continue
+                    if pre: pre.release(i)
+                    yield i, err or "변환 실패", None
+    finally:
+        for f in pending: f.cancel()
+        # 이미 실행 중인 변환이 미리 읽은 사본을 쓰고 있을 수 있음 → 끝난 뒤 스테이징 정리
+        left = [f for f, i in pending.items() if i is None and not f.done()]
+        if pre and left: threading.Thread(target=lambda: (wait(left), pre.close()), daemon=True).start()
+        elif pre: pre.close()
+
+# ── 파일별 텍스트 인덱스 캐시 (메모리 LRU) ──────────────
+# 레이어를 바꿔 다시 미리보기할 때 파일을 다시 파싱하지 않고 인덱스에서 필터링
+INDEX_MAX_MB = int(os.environ.get("CAD_RENAMER_INDEX_MB", "256"))
+
+class TextIndexCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes; self.size = 0
+        self.items = OrderedDict(); self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            hit = self.items.get(key)
+            if hit is None: return None
+            self.items.move_to_end(key)
+            return hit[0]
+
+    def put(self, key, ents):
+        cost = ents.nbytes()
+        with self.lock:
+            old = self.items.pop(key, None)
+            if old: self.size -= old[1]
+            self.items[key] = (ents, cost); self.size += cost
+            while self.size > self.max_bytes and len(self.items) > 1:
+                _, (_, c) = self.items.popitem(last=False); self.size -= c
+
+TEXT_INDEX = TextIndexCache(INDEX_MAX_MB << 20)
+
+def _file_id(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+# ── 폴더 색인 (SQLite, 실행 간 유지) ─────────────────────
+# 한 번 파싱한 파일의 레이어별 텍스트 수, 추출한 제목, 파일명 변경 이력을 디스크에 보관
+# → 크기·수정 시각이 그대로인 파일은 다시 열 때 변환·파싱 없이 바로 사용. 경로 키는 _file_id의 절대 경로
+# DB를 열 수 없으면(읽기 전용 위치 등) 색인 없이 동작
+DB_PATH = Path(os.environ.get("CAD_RENAMER_DB") or CACHE_DIR.parent / "index.sqlite3")
+DB_CHUNK = 500   # IN (...) 한 번에 묻는 경로 수
+
+class FolderIndex:
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, dir TEXT, size INTEGER, mtime_ns INTEGER,
+                                      layers TEXT, seen REAL);
+    CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+    CREATE TABLE IF NOT EXISTS titles (path TEXT, layer TEXT, strategy TEXT, size INTEGER, mtime_ns INTEGER,
+                                       row TEXT, PRIMARY KEY (path, layer, strategy));
+    CREATE TABLE IF NOT EXISTS renames (id INTEGER PRIMARY KEY, at REAL, action TEXT, old TEXT, new TEXT,
+                                        journal TEXT);
+    """
+
+    def __init__(self, path):
+        self.path = path; self.db = None; self.lock = threading.Lock()
+
+    def _do(self, fn, default=None):
+        with self.lock:
+            try:
+                if self.db is None:
+                    self.db = False
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+                    db.execute("PRAGMA journal_mode=WAL"); db.execute("PRAGMA synchronous=NORMAL")
+                    db.executescript(self.SCHEMA); self.db = db
+                if not self.db: return default
+                with self.db: return fn(self.db)
+            except (sqlite3.Error, OSError):
+                return default
+
+    # 크기·수정 시각이 같은 행만 → {키: 행}
+    def _lookup(self, db, sql, keys, *args):
+        keys = {k[0]: k for k in keys}; out = {}; paths = list(keys)
+        for n in range(0, len(paths), DB_CHUNK):
+            part = paths[n:n + DB_CHUNK]
+            q = sql.format(",".join("?" * len(part)))
+            for path, size, mtime, val in db.execute(q, (*args, *part)):
+                k = keys[path]
+                if (size, mtime) == k[1:]: out[k] = val
+        return out
+
+    def layers(self, keys):
+        rows = self._do(lambda db: self._lookup(
+            db, "SELECT path, size, mtime_ns, layers FROM files WHERE layers IS NOT NULL AND path IN ({})", keys), {})
+        return {k: Counter(json.loads(v)) for k, v in rows.items()}
+
+    def put_layers(self, key, counts):
+        path, size, mtime = key
+        self._do(lambda db: db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (path, os.path.dirname(path), size, mtime, json.dumps(dict(counts), ensure_ascii=False), time.time())))
+
+    def titles(self, keys, layer, strategy):
+        rows = self._do(lambda db: self._lookup(
+            db, "SELECT path, size, mtime_ns, row FROM titles WHERE layer = ? AND strategy = ? AND path IN ({})",
+            keys, layer.upper(), strategy), {})
+        return {k: json.loads(v) for k, v in rows.items()}
+
+    def put_title(self, key, layer, strategy, row):
+        path, size, mtime = key
+        row = {k: row[k] for k in ("ok","title","error","texts")}
+        self._do(lambda db: db.execute(
+            "INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?, ?, ?)",
+            (path, layer.upper(), strategy, size, mtime, json.dumps(row, ensure_ascii=False))))
+
+    # 파일명 변경: 이력 기록 + 색인 행을 새 경로로 옮김 (rename은 크기·수정 시각을 바꾸지 않으므로 그대로 유효)
+    def moved(self, pairs, action, journal):
+        def run(db):
+            now = time.time()
+            for old, new in pairs:
+                old, new = os.path.abspath(old), os.path.abspath(new)
+                db.execute("INSERT INTO renames (at, action, old, new, journal) VALUES (?, ?, ?, ?, ?)",
+                           (now, action, old, new, journal))
+                for t in ("files", "titles"): db.execute(f"DELETE FROM {t} WHERE path = ?", (new,))
+                db.execute("UPDATE files SET path = ?, dir = ? WHERE path = ?", (new, os.path.dirname(new), old))
+                db.execute("UPDATE titles SET path = ? WHERE path = ?", (new, old))
+        if pairs: self._do(run)
+
+    # 폴더를 다시 훑은 뒤 목록에 없는 파일의 행 삭제
+    def prune(self, folder, seen, recursive=False):
+        folder = os.path.abspath(folder); sub = os.path.join(folder, "")
+        def run(db):
+            q = "SELECT path FROM files WHERE dir = ?" + (" OR substr(dir, 1, ?) = ?" if recursive else "")
+            gone = [(p,) for p, in db.execute(q, (folder, len(sub), sub) if recursive else (folder,)) if p not in seen]
+            db.executemany("DELETE FROM files WHERE path = ?", gone)
+            db.executemany("DELETE FROM titles WHERE path = ?", gone)
+            return [p for p, in gone]
+        return self._do(run, [])
+
+    def history(self, limit=100):
+        return self._do(lambda db: [
+            {"at":at,"action":a,"old":o,"new":n,"journal":j} for at, a, o, n, j in db.execute(
+                "SELECT at, action, old, new, journal FROM renames ORDER BY id DESC LIMIT ?", (limit,))], [])
+
+FOLDER_INDEX = FolderIndex(DB_PATH)
+
+# pipeline(paths, text_index)과 같은 형태로 반환하되, 변경 없는 파일은 캐시된 인덱스를 즉시 반환
+def indexed(paths, cancel=None, stop=None, step=None):
+    keys = [None] * len(paths); miss = []
+    for i, p in enumerate(paths):
+        try: keys[i] = _file_id(p)
+        except OSError as e: yield i, str(e), None; continue
+        hit = TEXT_INDEX.get(keys[i])
+        METRICS.inc("cache_total", cache="index", result="miss" if hit is None else "hit")
+        if hit is not None: yield i, None, hit
+        else: miss.append(i)
+    for j, err, res in pipeline([paths[i] for i in miss], index_task, cancel=cancel, stop=stop, step=step):
+        i = miss[j]; ents = None
+        if res is not None:
+            ents, st = res; TEXT_INDEX.put(keys[i], ents); FOLDER_INDEX.put_layers(keys[i], ents.layer_counts())
+            METRICS.observe("stage_seconds", st["sec"] - st["decode"], stage="parse")
+            METRICS.observe("stage_seconds", st["decode"], stage="decode")
+            METRICS.observe("parse_bytes", st["bytes"], Metrics.BYTE_BUCKETS)
+            METRICS.observe("parse_entities", st["entities"], Metrics.COUNT_BUCKETS)
+            METRICS.file(path=paths[i], parse_sec=round(st["sec"], 4), decode_sec=round(st["decode"], 4),
+                         bytes=st["bytes"], entities=st["entities"])
+        else:
+            METRICS.inc("file_error_total")
+        yield i, err, ents
+
+# ── 폴더 전체 레이어 통계 ────────────────────────────────
+# 첫 파일만 보면 템플릿이 섞인 폴더에서 틀리기 쉬움 → 여러 파일에서 레이어별 포함 파일 수·텍스트 수 집계
+STATS_SAMPLE = int(os.environ.get("CAD_RENAMER_STATS_SAMPLE", "40"))     # 최소 표본 파일 수
+STATS_BUDGET = float(os.environ.get("CAD_RENAMER_STATS_BUDGET", "30"))   # 최대 소요 시간(초)
+STATS_STABLE = 5                                                           # 상위 순위가 이만큼 연속 유지되면 확정
+
+# 표본 추출을 멈추는 pipeline의 stop — set()이 불리거나, 기한(deadline)이 정해진 뒤 지나면 켜진 것으로 봄
+class _StopWhen:
+    def __init__(self):
+        self.deadline = None; self.stopped = False
+
+    def set(self):
+        self.stopped = True
+
+    def is_set(self):
+        return self.stopped or (self.deadline is not None and time.monotonic() > self.deadline)
+
+def _rank(files_n, texts_n):
+    return sorted(files_n, key=lambda l: (-files_n[l], -texts_n[l], l))
+
+# 폴더 전체에 고르게 퍼지도록 섞은 순서로 병렬 집계, (처리 수, 파싱 성공 수, 순위별 통계)를 반환하며 진행
+# 폴더 색인에 있는(변경 없는) 파일은 파싱 없이 먼저 모두 집계하고, 나머지만 표본 추출
+# 표본 추출은 작은 묶음으로 변환하고, 표본이 차거나 시간이 다 되면 새 변환을 멈추고 반환
+# 시간 제한은 한 파일이라도 파싱된 뒤(또는 표본 수만큼 실패한 뒤)부터 적용 — 변환 한 번이 제한보다 길어도
+# 레이어 목록이 비지 않음. 실행 중이던 변환은 끝까지 진행해 캐시에 남으므로 다시 훑으면 그만큼 빨라짐
+def layer_stats(paths, sample=STATS_SAMPLE, budget=STATS_BUDGET, cancel=None):
+    order = list(range(len(paths))); random.Random(0).shuffle(order)
+    files_n, texts_n = Counter(), Counter()
+    done = parsed = stable = 0; top = None; t0 = time.monotonic()
+    keys = {}
+    for i in order:
+        try: keys[i] = _file_id(paths[i])
+        except OSError: pass
+    known = FOLDER_INDEX.layers(keys.values())
+    METRICS.inc("cache_total", len(known), cache="db", result="hit")
+    METRICS.inc("cache_total", len(keys) - len(known), cache="db", result="miss")
+    for c in known.values():
+        files_n.update(c.keys()); texts_n.update(c)
+    if known:
+        done = parsed = len(known); rank = _rank(files_n, texts_n); top = rank[:5]
+        yield done, parsed, [{"name":l,"files":files_n[l],"texts":texts_n[l]} for l in rank]
+    order = [i for i in order if keys.get(i) not in known]
+    stop = _StopWhen()
+    if parsed: stop.deadline = t0 + budget
+    for _, err, ents in indexed([paths[i] for i in order], cancel, stop, max(1, sample // (CONV_WORKERS * 2))):
+        done += 1
+        if not err:
+            parsed += 1
+            c = ents.layer_counts()
+            files_n.update(c.keys()); texts_n.update(c)
+        rank = _rank(files_n, texts_n)
+        stable = stable + 1 if rank[:5] == top else 0; top = rank[:5]
+        yield done, parsed, [{"name":l,"files":files_n[l],"texts":texts_n[l]} for l in rank]
+        if stop.deadline is None and (parsed or done >= sample): stop.deadline = t0 + budget
+        if (parsed >= sample and stable >= STATS_STABLE) or stop.is_set(): stop.set(); break
+
+def _preview_row(fi, layer, err, store, strategy=None):
+    if err:
+        return {**fi,"ok":False,"error":err,"title":"","texts":[]}
+    ids = store.layer_ids(layer)
+    if not ids:
+        return {**fi,"ok":False,"error":f"레이어 '{layer}'에 텍스트 없음","title":"","texts":[]}
+    with timed("pick_title"): title = pick_title(store, layer, strategy)
+    if not title:
+        return {**fi,"ok":False,"error":"유효한 제목 없음","title":"","texts":[store.text(i) for i in ids[:6]]}
+    return {**fi,"ok":True,"title":sanitize(title),"texts":[store.text(i) for i in ids[:6]],"error":""}
+
+# 폴더 색인에 같은 레이어·선택 방식으로 추출해 둔 결과가 있으면 그대로, 없으면 파싱 후 색인에 저장
+# 변환 실패처럼 다시 시도하면 달라질 수 있는 오류는 저장하지 않음
+def preview_rows(files, layer, strategy=None, cancel=None):
+    strategy = strategy or TITLE_STRATEGY; keys = {}
+    for i, fi in enumerate(files):
+        try: keys[i] = _file_id(fi["path"])
+        except OSError: pass
+    known = FOLDER_INDEX.titles(keys.values(), layer, strategy); miss = []
+    METRICS.inc("cache_total", len(known), cache="db", result="hit")
+    METRICS.inc("cache_total", len(keys) - len(known), cache="db", result="miss")
+    for i, fi in enumerate(files):
+        r = known.get(keys.get(i))
+        if r is not None: yield i, {**fi, **r}
+        else: miss.append(i)
+    for j, err, store in indexed([files[i]["path"] for i in miss], cancel):
+        i = miss[j]; row = _preview_row(files[i], layer, err, store, strategy)
+        if not err and i in keys: FOLDER_INDEX.put_title(keys[i], layer, strategy, row)
+        yield i, row
+
+# ── 파일 목록 ────────────────────────────────────────────
+# os.scandir로 폴더 단위(이름순)로 목록을 내보냄 → 큰 보관 폴더도 첫 폴더부터 바로 처리 시작
+# recursive면 하위 폴더까지 깊이 우선. rel은 시작 폴더 기준 상대 경로
+def iter_cad_files(folder, recursive=False):
+    stack = [folder]
+    while stack:
+        t0 = time.perf_counter(); d = stack.pop()
+        try:
+            with os.scandir(d) as it: ents = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        files = []
+        for e in ents:
+            ext = os.path.splitext(e.name)[1].lower()
+            if ext in (".dxf",".dwg") and e.is_file():
+                files.append({"name":e.name,"path":e.path,"ext":ext[1:].upper(),"rel":os.path.relpath(e.path, folder)})
+        if recursive:
+            stack += [e.path for e in reversed(ents) if e.is_dir(follow_symlinks=False)]
+        METRICS.observe("stage_seconds", time.perf_counter() - t0, stage="list")
+        if files: yield files
+
+def list_cad_files(folder, recursive=False):
+    return [fi for part in iter_cad_files(folder, recursive) for fi in part]
+
+# ── 파일명 변경 (저널 기록 → 실행, 되돌리기 / 이어하기) ─────
+# 폴더마다 목록을 한 번만 읽어 메모리에서 충돌 이름(_1, _2 …)을 정하고, 실행 전 계획을 저널에 기록
+# → 중간에 종료돼도 저널로 이어하기·되돌리기 가능. 파일당 비용은 rename 1회
+JOURNAL_DIR  = CACHE_DIR.parent / "journal"
+JOURNAL_KEEP = 50
+_journal_seq = 0
+
+def _plan_renames(items):
+    taken, nxt, steps, done, fail = {}, {}, [], [], []
+    for item in items:
+        # 절대 경로로 → 저널을 다른 작업 폴더에서 이어하기·되돌리기해도 같은 파일을 가리킴
+        src = Path(os.path.abspath(item["path"])); new = sanitize(item.get("new_name",""))
+        if not new:
+            fail.append({"name":src.name,"path":str(src),"error":"새 이름 없음"}); continue
+        d = str(src.parent)
+        if d not in taken:
+            try: taken[d] = {n.casefold() for n in os.listdir(d)}
+            except OSError as e: taken[d] = e
+        names = taken[d]
+        if isinstance(names, OSError):
+            fail.append({"name":src.name,"path":str(src),"error":str(names)}); continue
+        if src.name.casefold() not in names:
+            fail.append({"name":src.name,"path":str(src),"error":"파일 없음"}); continue
+        dst = new + src.suffix
+        if dst == src.name:
+            done.append({"old":src.name,"new":dst,"path":str(src)}); continue
+        key = (d, dst.casefold()); c = nxt.get(key, 1)
+        while dst.casefold() in names and dst.casefold() != src.name.casefold():
+            dst = f"{new}_{c}{src.suffix}"; c += 1
+        nxt[key] = c
+        names.discard(src.name.casefold()); names.add(dst.casefold())
+        steps.append({"src":str(src),"dst":str(src.parent / dst)})
+    return steps, done, fail
+
+def _journal_new(steps):
+    global _journal_seq
+    JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+    old = sorted(JOURNAL_DIR.glob("*.jsonl"))
+    for p in old[:max(0, len(old) - JOURNAL_KEEP + 1)]:
+        try: p.unlink()
+        except OSError: pass
+    _journal_seq += 1
+    path = JOURNAL_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{_journal_seq}.jsonl"
+    with open(path, "w", encoding="utf-8") as j:
+        j.write(json.dumps({"op":"plan","created":time.time(),"count":len(steps)}) + "\n")
+        for k, st in enumerate(steps): j.write(json.dumps({"i":k, **st}, ensure_ascii=False) + "\n")
+        j.flush(); os.fsync(j.fileno())
+    return path
+
+def _journal_read(path):
+    steps, done, undone = [], set(), set()
+    with open(path, encoding="utf-8") as j:
+        for line in j:
+            try: r = json.loads(line)
+            except ValueError: continue   # 종료 직전 반쯤 쓰인 줄
+            if "src" in r: steps.append(r)
+            elif "done" in r: done.add(r["done"]); undone.discard(r["done"])
+            elif "undone" in r: undone.add(r["undone"])
+    return steps, done - undone
+
+def _journal_run(path, steps, todo, undo=False):
+    done, fail, moved = [], [], []; mark = "undone" if undo else "done"
+    with open(path, "a", encoding="utf-8") as j:
+        for k in todo:
+            a, b = (steps[k]["dst"], steps[k]["src"]) if undo else (steps[k]["src"], steps[k]["dst"])
+            try:
+                # 목록을 읽은 뒤 생긴 파일(다른 변경 작업 등)을 덮어쓰지 않음 — POSIX의 rename은 묻지 않고 덮어씀
+                # (대소문자만 바꾸는 경우 Windows에서는 같은 파일이므로 허용)
+                if os.path.lexists(b) and not os.path.samefile(a, b):
+                    raise FileExistsError(errno.EEXIST, "대상 파일이 이미 있음", b)
+                os.rename(a, b)
+                j.write(json.dumps({mark:k}) + "\n"); j.flush()
+                done.append({"old":Path(a).name,"new":Path(b).name,"path":a}); moved.append((a, b))
+            except OSError as e:
+                fail.append({"name":Path(a).name,"path":a,"error":str(e)})
+        os.fsync(j.fileno())
+    FOLDER_INDEX.moved(moved, "undo" if undo else "rename", Path(path).name)
+    return done, fail
+
+def find_journal(name=None):
+    if name: return JOURNAL_DIR / Path(name).name
+    js = sorted(JOURNAL_DIR.glob("*.jsonl")) if JOURNAL_DIR.is_dir() else []
+    return js[-1] if js else None
+
+def rename_items(items):
+    with timed("rename_plan"): steps, done, fail = _plan_renames(items)
+    if not steps: return done, fail, None
+    with timed("rename_journal"): path = _journal_new(steps)
+    with timed("rename_exec"): d, f = _journal_run(path, steps, range(len(steps)))
+    METRICS.inc("renamed_total", len(d)); METRICS.inc("rename_fail_total", len(fail) + len(f))
+    return done + d, fail + f, path.name
+
+# 기록되지 않은 단계는 원본이 없고 대상이 있으면 이미 실행된 것으로 보고 건너뜀(이어하기) / 되돌릴 대상에 포함(되돌리기)
+def _journal_state(path):
+    steps, done = _journal_read(path)
+    for k, st in enumerate(steps):
+        if k not in done and not os.path.exists(st["src"]) and os.path.exists(st["dst"]): done.add(k)
+    return steps, done
+
+def resume_journal(name=None):
+    path = find_journal(name)
+    if not path or not path.exists(): return [], [{"name":"","error":"저널 없음"}], None
+    steps, done = _journal_state(path)
+    d, f = _journal_run(path, steps, [k for k in range(len(steps)) if k not in done])
+    return d, f, path.name
+
+def undo_journal(name=None):
+    path = find_journal(name)
+    if not path or not path.exists(): return [], [{"name":"","error":"저널 없음"}], None
+    steps, done = _journal_state(path)
+    d, f = _journal_run(path, steps, sorted(done, reverse=True), undo=True)
+    return d, f, path.name
+
+# ── scan / preview 이벤트 ────────────────────────────────
+# 일반 응답(모아서), /stream(NDJSON 즉시 전송), 백그라운드 작업(/api/jobs)이 모두 이 제너레이터를 사용
+def scan_events(body, cancel=None):
+    try:
+        folder = _text(body, "folder"); recursive = bool(body.get("recursive"))
+        sample, budget = _num(body, "sample", STATS_SAMPLE), _num(body, "budget", STATS_BUDGET, float)
+    except BadRequest as e: yield {"type":"error","error":str(e)}; return
+    if not folder or not os.path.isdir(folder):
+        yield {"type":"error","error":"폴더를 찾을 수 없습니다."}; return
+    files = []
+    for part in iter_cad_files(folder, recursive):
+        files += part
+        if cancel is not None and cancel.is_set(): return
+        yield {"type":"files","files":part}
+    if not files:
+        yield {"type":"error","error":"DWG / DXF 파일이 없습니다."}; return
+    FOLDER_INDEX.prune(folder, {os.path.abspath(fi["path"]) for fi in files}, recursive)
+    stats = []; parsed = 0
+    for done, parsed, stats in layer_stats([fi["path"] for fi in files], sample, budget, cancel):
+        yield {"type":"progress","done":done,"total":len(files)}
+    yield {"type":"layers","layers":[st["name"] for st in stats],"stats":stats,"sampled":parsed}
+
+def preview_events(body, cancel=None):
+    try: files, layer, strategy = _file_list(body, "files"), _text(body, "layer"), _text(body, "strategy") or None
+    except BadRequest as e: yield {"type":"error","error":str(e)}; return
+    if not files or not layer:
+        yield {"type":"error","error":"파일 또는 레이어 없음"}; return
+    if strategy and strategy not in TITLE_STRATEGIES:
+        yield {"type":"error","error":f"알 수 없는 제목 선택 방식: {strategy}"}; return
+    yield {"type":"start","total":len(files)}
+    for i, row in preview_rows(files, layer, strategy, cancel):
+        yield {"type":"row","i":i,"row":row}
+
+# 폴더를 주기적으로 다시 훑어 새로 생기거나 바뀐 도면만 파싱해 색인에 반영, 사라진 파일은 색인에서 삭제
+# cancel이 켜질 때까지 반복 (백그라운드 작업 또는 명령줄 watch)
+WATCH_INTERVAL = float(os.environ.get("CAD_RENAMER_WATCH_SEC", "10"))
+
+def watch_events(body, cancel=None):
+    try:
+        folder = _text(body, "folder"); recursive = bool(body.get("recursive"))
+        interval = _num(body, "interval", WATCH_INTERVAL, float)
+    except BadRequest as e: yield {"type":"error","error":str(e)}; return
+    cancel = cancel or threading.Event()
+    if not folder or not os.path.isdir(folder):
+        yield {"type":"error","error":"폴더를 찾을 수 없습니다."}; return
+    seen = {}
+    while not cancel.is_set():
+        cur = {}
+        for fi in list_cad_files(folder, recursive):
+            try: cur[fi["path"]] = _file_id(fi["path"])
+            except OSError: pass
+        changed = [p for p, k in cur.items() if seen.get(p) != k]
+        known = FOLDER_INDEX.layers(cur[p] for p in changed)
+        todo = [p for p in changed if cur[p] not in known]
+        for n, (i, err, store) in enumerate(indexed(todo, cancel), 1):
+            yield {"type":"progress","done":n,"total":len(todo)}
+            yield {"type":"indexed","path":cur[todo[i]][0],"error":err,
+                   "layers":dict(store.layer_counts()) if store is not None else {}}
+        if cancel.is_set(): break
+        removed = FOLDER_INDEX.prune(folder, {k[0] for k in cur.values()}, recursive)
+        for p in removed: yield {"type":"removed","path":p}
+        yield {"type":"pass","at":time.time(),"files":len(cur),"indexed":len(todo),"removed":len(removed)}
+        seen = cur
+        cancel.wait(interval)
+
+# 이름 변경은 파일당 rename 1회로 짧고, 중간에 끊으면 저널 이어하기가 필요해지므로 취소하지 않음
+# {"items": [...]} 대신 {"preview": 작업 id, "edits": {번호: 새 이름}}로 보내면 서버에 있는 미리보기 결과로 목록을 만듦
+# → 화면에 모든 행을 두지 않아도 됨. 수정하지 않은 행은 추출된 제목(실패 행은 현재 이름 그대로)
+def rename_events(body, cancel=None):
+    try:
+        items, preview, edits = _file_list(body, "items", "new_name"), _text(body, "preview"), body.get("edits") or {}
+        if not isinstance(edits, dict): raise BadRequest("잘못된 값: edits (객체여야 함)")
+    except BadRequest as e: yield {"type":"error","error":str(e)}; return
+    if preview:
+        job = JOBS.get(preview)
+        if job is None or job.kind != "preview" or job.rows is None:
+            yield {"type":"error","error":"미리보기 결과가 없습니다. 다시 미리보기를 생성해주세요."}; return
+        # 진행 중이면 아직 처리되지 않은 행이 빠진 채 일부만 바뀜 → 끝났거나 취소된 미리보기만
+        if job.status not in ("done", "cancelled"):
+            yield {"type":"error","error":"미리보기가 아직 끝나지 않았습니다. 완료된 뒤 다시 시도해주세요."}; return
+        items = [{"path":r["path"],"new_name":str(edits.get(str(i), r["title"] if r["ok"] else Path(r["path"]).stem)).strip()}
+                 for i, r in enumerate(job.rows) if r is not None]
+        items = [it for it in items if it["new_name"]]
+    yield {"type":"start","total":len(items)}
+    done, fail, journal = rename_items(items)
+    yield {"type":"result","done":done,"fail":fail,"journal":journal}
+
+# ── 결과 페이지 ───────────────────────────────────────────
+# 작업에 저장된 미리보기·변경 결과를 한 번에 보내지 않고 (필터 → 정렬 → offset/limit) 구간만 반환
+# (GET /api/jobs/<id>/rows — 페이지마다 미리보기를 다시 실행하지 않도록 작업 결과에서만 제공)
+# 아직 처리 중인 행은 전체 보기에서만 자리표시(pending)로 포함
+PAGE_LIMIT = 1000
+PAGE_SORTS = {
+    "index":  lambda i, r: i,
+    "name":   lambda i, r: (r.get("rel") or r.get("name") or r.get("old") or "").casefold(),
+    "title":  lambda i, r: (r.get("title") or r.get("new") or "").casefold(),
+    "status": lambda i, r: (bool(r.get("ok")), r.get("error") or ""),   # 오름차순 = 실패 먼저
+}
+
+def page_rows(rows, q, blank=lambda i: {}):
+    q = {k: (v[0] if isinstance(v, list) else v) for k, v in q.items()}
+    offset = max(0, _num(q, "offset", 0)); limit = min(PAGE_LIMIT, max(0, _num(q, "limit", 100)))
+    flt = q.get("filter") or "all"; sort = PAGE_SORTS.get(q.get("sort") or "index", PAGE_SORTS["index"])
+    desc = str(q.get("desc", "")).lower() in ("1", "true")
+    have = [(i, r) for i, r in enumerate(rows) if r is not None]
+    ok = sum(1 for _, r in have if r["ok"])
+    counts = {"all":len(rows),"ok":ok,"error":len(have) - ok,"pending":len(rows) - len(have)}
+    if flt in ("ok","error"):
+        sel = [(i, r) for i, r in have if r["ok"] == (flt == "ok")]
+    else:
+        sel = have if not counts["pending"] else [(i, r if r is not None else {**blank(i),"pending":True})
+                                                  for i, r in enumerate(rows)]
+    if sort is not PAGE_SORTS["index"] or desc:   # 아직 처리 전인 행은 정렬 방향과 관계없이 맨 뒤
+        sel.sort(key=lambda ir: sort(*ir), reverse=desc); sel.sort(key=lambda ir: bool(ir[1].get("pending")))
+    return {"total":len(sel),"counts":counts,"offset":offset,
+            "rows":[{**r,"i":i} for i, r in sel[offset:offset + limit]]}
+
+# ── 백그라운드 작업 ───────────────────────────────────────
+# POST /api/jobs로 시작하고 GET으로 진행 상태·결과를 조회. 브라우저를 닫거나 새로고침해도 작업은 계속되고,
+# /cancel 요청 시 남은 파일을 버리고 실행 중인 변환기 프로세스를 종료
+JOB_KINDS = {"scan": scan_events, "preview": preview_events, "rename": rename_events, "watch": watch_events}
+JOB_WORKERS = int(os.environ.get("CAD_RENAMER_JOBS") or 2)
+JOB_KEEP = 50
+JOB_OWN_THREAD = {"watch"}   # 취소할 때까지 끝나지 않는 작업 → 풀 작업자를 계속 차지하지 않도록 전용 스레드에서 실행
+JOBS, _jobs_lock = OrderedDict(), threading.Lock()
+_job_pool = None
+
+class Job:
+    def __init__(self, kind, body):
+        self.id = os.urandom(6).hex(); self.kind = kind; self.body = body
+        self.status = "queued"; self.error = None
+        self.done = 0; self.total = 0
+        self.events = []                      # progress를 제외한 모든 이벤트 (offset으로 이어받기)
+        self.rows = None; self.result = None  # 미리보기 행 / 변경 결과 행 (페이지 조회용), 변경 요약
+        self.cancel = threading.Event()
+        self.created = time.time(); self.finished = None
+
+    def summary(self):
+        return {"id":self.id,"kind":self.kind,"status":self.status,"error":self.error,
+                "done":self.done,"total":self.total,"events":len(self.events),"result":self.result,
+                "created":self.created,"finished":self.finished}
+
+    def page(self, q):
+        files = self.body.get("files") or []
+        return page_rows(self.rows or [], q, lambda i: files[i] if i < len(files) else {})
+
+    def run(self):
+        if self.cancel.is_set():
+            self.status = "cancelled"; self.finished = time.time(); return
+        self.status = "running"
+        try:
+            for ev in JOB_KINDS[self.kind](self.body, self.cancel):
+                if ev["type"] == "progress":
+                    self.done, self.total = ev["done"], ev["total"]; continue
+                if ev["type"] == "files": self.total += len(ev["files"])
+                elif ev["type"] == "start": self.total = ev["total"]; self.rows = [None] * ev["total"]
+                elif ev["type"] == "row": self.done += 1; self.rows[ev["i"]] = ev["row"]
+                elif ev["type"] == "result":
+                    self.rows = [{"ok":True,**d} for d in ev["done"]] + [{"ok":False,**f} for f in ev["fail"]]
+                    self.done = len(self.rows)
+                    self.result = {"done":len(ev["done"]),"fail":len(ev["fail"]),"journal":ev["journal"]}
+                elif ev["type"] == "error": self.error = ev["error"]
+                self.events.append(ev)
+            self.status = "cancelled" if self.cancel.is_set() else "error" if self.error else "done"
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            self.status = "cancelled" if isinstance(e, Cancelled) else "error"
+        finally:
+            self.finished = time.time()
+
+def start_job(kind, body):
+    global _job_pool
+    job = Job(kind, body)
+    with _jobs_lock:
+        if _job_pool is None: _job_pool = ThreadPoolExecutor(JOB_WORKERS, thread_name_prefix="job")
+        JOBS[job.id] = job
+        old = [k for k, j in JOBS.items() if j.finished][:-JOB_KEEP or None]
+        for k in old: del JOBS[k]
+    if kind in JOB_OWN_THREAD: threading.Thread(target=job.run, name=f"job-{kind}", daemon=True).start()
+    else: _job_pool.submit(job.run)
+    return job
+
+# 첫 요청에서 spawn 비용(인터프리터 기동 + 모듈 import)을 내지 않도록 서버 시작 시 워커를 미리 띄움
+def warm_pools():
+    conv, parse = _pools()
+    for f in [parse.submit(os.getpid) for _ in range(PARSE_WORKERS)]: f.result()
+
 # ── HTTP 핸들러 ───────────────────────────────────────────
+_profile_lock = threading.Lock()   # ?profile=1 요청은 한 번에 하나만
+
 class Handler(http.server.BaseHTTPRequestHandler):
     def log_message(self, *a): pass
 
     def do_GET(self):
-        if self.path in ("/", "/index.html"):
+        try: self._get(urlsplit(self.path))
+        except BadRequest as e: self._json({"ok":False,"error":str(e)}, 400)
+
+    def _get(self, url):
+        if url.path in ("/", "/index.html"):
             self._respond(200, "text/html; charset=utf-8", HTML.encode())
-        elif self.path == "/api/info":
+        elif url.path == "/api/info":
             self._json({"conv_type": CONV_TYPE, "conv_path": CONV_PATH})
+        elif url.path == "/api/metrics":
+            if parse_qs(url.query).get("format") == ["prom"]:
+                self._respond(200, "text/plain; version=0.0.4; charset=utf-8", METRICS.prometheus().encode())
+            else:
+                self._json(METRICS.snapshot())
+        elif url.path == "/api/history":
+            self._json({"ok":True,"renames":FOLDER_INDEX.history(_num(parse_qs(url.query), "limit", 100))})
+        elif url.path == "/api/jobs":
+            with _jobs_lock: jobs = [j.summary() for j in JOBS.values()]
+            self._json({"ok":True,"jobs":jobs[::-1]})
+        elif url.path.startswith("/api/jobs/"):
+            jid, _, sub = url.path[len("/api/jobs/"):].partition("/")
+            job = JOBS.get(jid)
+            if job is None: return self._json({"ok":False,"error":"작업 없음"}, 404)
+            if sub == "rows":
+                return self._json({"ok":True,"job":job.summary(),**job.page(parse_qs(url.query))})
+            if sub == "results":
+                # 요약을 먼저 만들어야 finished인 작업의 마지막 이벤트가 빠지지 않음
+                off = max(0, _num(parse_qs(url.query), "offset", 0))
+                summary = job.summary(); evs = job.events[off:]
+                self._json({"ok":True,"job":summary,"events":evs,"next":off + len(evs)})
+            else:
+                self._json({"ok":True,"job":job.summary()})
         else:
             self._respond(404, "text/plain", b"not found")
 
     def do_POST(self):
-        n = int(self.headers.get("Content-Length", 0))
-        body = json.loads(self.rfile.read(n))
-        {"/api/scan": self._scan,
-         "/api/preview": self._preview,
-         "/api/rename": self._rename
-        }.get(self.path, lambda b: self._json({"ok":False,"error":"not found"}, 404))(body)
-
-    def _scan(self, body):
-        folder = body.get("folder","").strip()
-        if not folder or not os.path.isdir(folder):
-            return self._json({"ok":False,"error":"폴더를 찾을 수 없습니다."})
-        files = [{"name":f.name,"path":str(f),"ext":f.suffix.lower()[1:].upper()}
-                 for f in sorted(Path(folder).iterdir())
-                 if f.suffix.lower() in (".dxf",".dwg")]
-        if not files:
-            return self._json({"ok":False,"error":"DWG / DXF 파일이 없습니다."})
-        layers = []
-        tmpdir = tempfile.mkdtemp()
+        url = urlsplit(self.path)
+        n = int(self.headers.get("Content-Length") or 0)
+        try: body = json.loads(self.rfile.read(n)) if n else {}
+        except ValueError: body = None
+        if not isinstance(body, dict): return self._json({"ok":False,"error":"요청 본문이 JSON 객체가 아님"}, 400)
+        routes = {"/api/scan": self._scan,
+                  "/api/scan/stream": lambda b: self._stream(scan_events, b),
+                  "/api/preview": self._preview,
+                  "/api/preview/stream": lambda b: self._stream(preview_events, b),
+                  "/api/rename": self._rename,
+                  "/api/undo": self._undo,
+                  "/api/resume": self._resume,
+                  "/api/jobs": self._job_start}
+        if url.path.startswith("/api/jobs/") and url.path.endswith("/cancel"):
+            job = JOBS.get(url.path[len("/api/jobs/"):-len("/cancel")])
+            if job is None: return self._json({"ok":False,"error":"작업 없음"}, 404)
+            job.cancel.set()
+            return self._json({"ok":True,"job":job.summary()})
+        # ?profile=1 또는 {"profile": true} → 이 요청 동안 cProfile로 측정해 응답에 상위 병목 함수 포함
+        # 프로파일러는 프로세스에 하나만 켤 수 있음(3.12+는 sys.monitoring 기반으로 모든 스레드를 측정)
+        # → 동시에 한 요청만, 나머지는 409. 결과에는 같은 시간 다른 스레드의 작업도 섞일 수 있음
+        want = parse_qs(url.query).get("profile") == ["1"] or bool(body.get("profile")); self._prof = None
+        if want:
+            if not _profile_lock.acquire(blocking=False):
+                return self._json({"ok":False,"error":"다른 요청을 프로파일링하는 중입니다."}, 409)
+            self._prof = cProfile.Profile()
+            try: self._prof.enable()
+            except ValueError as e:   # 다른 프로파일링 도구가 이미 사용 중
+                self._prof = None; _profile_lock.release()
+                return self._json({"ok":False,"error":str(e)}, 409)
+        t0 = time.perf_counter()
         try:
-            for fi in files:
-                dxf = fi["path"]
-                if fi["ext"] == "DWG":
-                    dxf, _ = dwg_to_dxf(fi["path"], tmpdir)
-                if dxf and os.path.exists(dxf):
-                    layers = get_layers(dxf)
-                    if layers: break
+            routes.get(url.path, lambda b: self._json({"ok":False,"error":"not found"}, 404))(body)
+        except BadRequest as e:
+            self._json({"ok":False,"error":str(e)}, 400)
         finally:
-            shutil.rmtree(tmpdir, ignore_errors=True)
-        self._json({"ok":True,"files":files,"layers":layers})
+            if self._prof: self._prof.disable(); self._prof = None
+            if want: _profile_lock.release()
+            METRICS.observe("request_seconds", time.perf_counter() - t0, path=url.path if url.path in routes else "other")
+
+    def _hotspots(self, top=25):
+        self._prof.disable(); st = pstats.Stats(self._prof, stream=io.StringIO()); self._prof = None
+        rows = sorted(st.stats.items(), key=lambda kv: -kv[1][3])[:top]
+        return [{"func":f"{Path(fn).name}:{line}({name})","calls":nc,"tottime":round(tt, 6),"cumtime":round(ct, 6)}
+                for (fn, line, name), (_, nc, tt, ct, _) in rows]
+
+    def _scan(self, body):
+        out = {"ok":True}
+        for ev in scan_events(body):
+            if ev["type"] == "error": return self._json({"ok":False,"error":ev["error"]})
+            if ev["type"] == "files": out.setdefault("files", []).extend(ev["files"])
+            if ev["type"] == "layers": out.update({k:v for k,v in ev.items() if k != "type"})
+        self._json(out)
 
     def _preview(self, body):
-        files = body.get("files",[]); layer = body.get("layer","").strip()
-        if not files or not layer:
-            return self._json({"ok":False,"error":"파일 또는 레이어 없음"})
-        tmpdir = tempfile.mkdtemp(); results = []
-        try:
-            for fi in files:
-                dxf = fi["path"]; err = None
-                if fi["ext"] == "DWG":
-                    dxf, err = dwg_to_dxf(fi["path"], tmpdir)
-                if not dxf or not os.path.exists(dxf):
-                    results.append({**fi,"ok":False,"error":err or "변환 실패","title":"","texts":[]}); continue
-                texts = extract_texts(dxf, layer)
-                if not texts:
-                    results.append({**fi,"ok":False,"error":f"레이어 '{layer}'에 텍스트 없음","title":"","texts":[]}); continue
-                title = pick_title(texts)
-                if not title:
-                    results.append({**fi,"ok":False,"error":"유효한 제목 없음","title":"","texts":[t for t,_,_ in texts]}); continue
-                results.append({**fi,"ok":True,"title":sanitize(title),"texts":[t for t,_,_ in texts[:6]],"error":""})
-        finally:
-            shutil.rmtree(tmpdir, ignore_errors=True)
+        results = []
+        for ev in preview_events(body):
+            if ev["type"] == "error": return self._json({"ok":False,"error":ev["error"]})
+            if ev["type"] == "start": results = [None] * ev["total"]
+            if ev["type"] == "row": results[ev["i"]] = ev["row"]
         self._json({"ok":True,"results":results})
 
     def _rename(self, body):
-        items = body.get("items",[]); done, fail = [], []
-        for item in items:
-            src = Path(item["path"]); new = sanitize(item["new_name"])
-            if not new:
-                fail.append({"name":src.name,"error":"새 이름 없음"}); continue
-            dst = src.parent / (new + src.suffix); c = 1
-            while dst.exists() and dst != src:
-                dst = src.parent / f"{new}_{c}{src.suffix}"; c += 1
-            try:
-                src.rename(dst); done.append({"old":src.name,"new":dst.name})
-            except Exception as e:
-                fail.append({"name":src.name,"error":str(e)})
-        self._json({"ok":True,"done":done,"fail":fail})
+        done, fail, journal = rename_items(_file_list(body, "items", "new_name"))
+        self._json({"ok":True,"done":done,"fail":fail,"journal":journal})
+
+    def _undo(self, body):
+        done, fail, journal = undo_journal(_text(body, "journal") or None)
+        self._json({"ok":True,"done":done,"fail":fail,"journal":journal})
+
+    def _resume(self, body):
+        done, fail, journal = resume_journal(_text(body, "journal") or None)
+        self._json({"ok":True,"done":done,"fail":fail,"journal":journal})
+
+    def _job_start(self, body):
+        kind = _text(body, "kind")
+        if kind not in JOB_KINDS:
+            return self._json({"ok":False,"error":f"알 수 없는 작업: {kind}"}, 400)
+        self._json({"ok":True,"job":start_job(kind, body).summary()})
 
     def _json(self, data, status=200):
+        if getattr(self, "_prof", None): data = {**data, "profile":self._hotspots()}
         p = json.dumps(data, ensure_ascii=False).encode()
         self._respond(status, "application/json; charset=utf-8", p)
 
+    # HTTP/1.0 + Content-Length 없음 → 연결 종료가 본문 끝. 클라이언트가 끊으면 남은 작업과 실행 중인 변환 취소
+    def _stream(self, make, body):
+        cancel = threading.Event(); events = make(body, cancel)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for ev in events:
+                self.wfile.write(json.dumps(ev, ensure_ascii=False).encode() + b"\n")
+            if getattr(self, "_prof", None):
+                self.wfile.write(json.dumps({"type":"profile","profile":self._hotspots()}).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            cancel.set()
+        finally:
+            events.close()
+
     def _respond(self, status, ctype, body):
         self.send_response(status)
         self.send_header("Content-Type", ctype)
@@ -252,6 +1536,8 @@ body{background:var(--bg);color:var(--light);font-family:'Noto Sans KR',sans-ser
 input[type=text]{flex:1;background:var(--bg3);border:1px solid var(--b2);border-radius:3px;padding:10px 14px;color:var(--light);font-family:'Noto Sans KR',sans-serif;font-size:13px;outline:none;transition:border-color .2s;}
 input[type=text]:focus{border-color:var(--cyan)}
 input::placeholder{color:#2e3f52}
+.rck{display:flex;align-items:center;gap:5px;font-size:12px;color:var(--gray);white-space:nowrap;cursor:pointer}
+.tsel{background:var(--bg3);border:1px solid var(--b2);border-radius:3px;padding:9px 10px;color:var(--light);font-family:'Noto Sans KR',sans-serif;font-size:12px;outline:none}.tsel:focus{border-color:var(--cyan)}
 .btn{border:none;border-radius:3px;cursor:pointer;font-family:'Noto Sans KR',sans-serif;font-size:13px;font-weight:700;padding:10px 20px;display:inline-flex;align-items:center;gap:7px;transition:.2s;white-space:nowrap;}
 .bc{background:var(--cyan);color:#000}.bc:hover{background:var(--cyan2)}.bc:disabled{background:#1a2e3a;color:#2a4555;cursor:not-allowed}
 .bg_{background:var(--green);color:#000}.bg_:hover{filter:brightness(1.1)}.bg_:disabled{background:#102018;color:#1a4030;cursor:not-allowed}
@@ -267,6 +1553,8 @@ input::placeholder{color:#2e3f52}
 .chip{background:var(--bg3);border:1px solid var(--b2);border-radius:3px;padding:6px 13px;font-size:11px;cursor:pointer;font-family:'Share Tech Mono',monospace;color:var(--gray);transition:.15s;user-select:none;}
 .chip:hover{border-color:var(--cyan);color:var(--cyan)}.chip.sel{background:rgba(0,229,255,.12);border-color:var(--cyan);color:var(--cyan)}
 .crec{font-size:9px;color:var(--yellow);margin-left:3px}
+.ccov{font-size:9px;color:var(--gray);margin-left:5px}
+.cx{background:transparent;border:1px solid rgba(0,229,255,.3);border-radius:3px;color:var(--cyan);font-size:11px;padding:1px 9px;margin-left:10px;cursor:pointer}.cx:hover{border-color:var(--red);color:var(--red)}
 .twrap{overflow-x:auto;border-radius:4px;border:1px solid var(--b2)}
 table{width:100%;border-collapse:collapse;font-size:12px}
 thead th{background:var(--bg3);padding:9px 12px;text-align:left;font-family:'Share Tech Mono',monospace;font-size:9px;letter-spacing:2px;color:var(--cyan);border-bottom:1px solid var(--b2);white-space:nowrap;}
@@ -286,6 +1574,11 @@ td{padding:9px 12px;vertical-align:middle}
 .rc{background:var(--bg3);border:1px solid var(--b2);border-radius:4px;padding:14px;text-align:center}
 .rv{font-family:'Share Tech Mono',monospace;font-size:26px;font-weight:700;line-height:1}
 .rl{font-size:9px;letter-spacing:2px;color:var(--gray);margin-top:3px}
+.vwrap{max-height:62vh;overflow-y:auto}
+.vwrap thead th{position:sticky;top:0;z-index:1}
+.vt tbody tr{height:38px}.vt td{white-space:nowrap;overflow:hidden;text-overflow:ellipsis;max-width:260px}
+.vt tbody tr.sp{height:auto}.vt tr.sp td{padding:0;border:none}
+.tbar{display:flex;gap:8px;align-items:center;margin-bottom:10px}.pcnt{font-size:11px;color:var(--gray);margin-left:6px}
 .hint{font-size:11px;color:var(--gray);margin-top:8px;line-height:1.7}.hint b{color:var(--yellow)}
 #s2,#s3,#s4{display:none}
 </style>
@@ -309,6 +1602,7 @@ td{padding:9px 12px;vertical-align:middle}
     <div class="stitle">📁 CAD 파일 폴더 경로 입력</div>
     <div class="row">
       <input type="text" id="fp" placeholder="예: C:\도면\2024프로젝트"/>
+      <label class="rck"><input type="checkbox" id="rc"> 하위 폴더 포함</label>
       <button class="btn bc" onclick="scan()">🔍 폴더 스캔</button>
     </div>
     <p class="hint">💡 폴더 안의 <b>모든 DWG / DXF</b> 파일을 불러옵니다. DWG는 <b>ODA File Converter</b>(무료) 또는 <b>LibreOffice</b> 필요.</p>
@@ -317,17 +1611,29 @@ td{padding:9px 12px;vertical-align:middle}
   <div class="step" id="s2">
     <div class="snum">STEP 02</div>
     <div class="stitle">🗂 도면 제목 레이어 선택</div>
-    <p style="font-size:12px;color:var(--gray);margin-bottom:10px">TEXT / MTEXT 레이어 목록입니다. 도면 표제란 레이어를 선택하세요.</p>
+    <p style="font-size:12px;color:var(--gray);margin-bottom:10px">TEXT / MTEXT 레이어 목록입니다. 폴더 내 포함 파일 수 순으로 정렬됩니다. 도면 표제란 레이어를 선택하세요.</p>
     <div class="lgrid" id="lg"></div>
     <p class="hint">💡 <b>★추천</b> 레이어를 먼저 시도해보세요.</p>
-    <div style="margin-top:12px"><button class="btn bc" id="pb" onclick="preview()" disabled>👁 미리보기 생성</button></div>
+    <div style="margin-top:12px;display:flex;gap:10px;align-items:center">
+      <button class="btn bc" id="pb" onclick="preview()" disabled>👁 미리보기 생성</button>
+      <select id="ts" class="tsel" title="레이어 안에서 제목으로 쓸 텍스트를 고르는 방식">
+        <option value="leftmost">가장 왼쪽 텍스트</option>
+        <option value="largest">가장 큰 글자</option>
+        <option value="titleblock">표제란(우측 하단)의 가장 큰 글자</option>
+      </select>
+    </div>
     <div class="st" id="st2"></div>
   </div>
   <div class="step" id="s3">
     <div class="snum">STEP 03</div>
     <div class="stitle">✏️ 변경될 파일명 확인 / 수정</div>
     <p style="font-size:12px;color:var(--gray);margin-bottom:12px">확인 후 <b style="color:var(--cyan)">새 파일명 셀을 클릭</b>해 수정할 수 있습니다.</p>
-    <div class="twrap"><table>
+    <div class="tbar">
+      <select id="pf" class="tsel" onchange="PV.set({filter:this.value})"><option value="all">전체</option><option value="ok">성공만</option><option value="error">실패만</option></select>
+      <select id="ps" class="tsel" onchange="PV.set({sort:this.value})"><option value="index">파일 순서</option><option value="name">현재 파일명순</option><option value="title">새 파일명순</option><option value="status">실패 먼저</option></select>
+      <span class="pcnt" id="pc"></span>
+    </div>
+    <div class="twrap vwrap" id="pw"><table class="vt">
       <thead><tr><th>형식</th><th>현재 파일명</th><th></th><th>새 파일명 (클릭 수정)</th><th>추출된 텍스트</th><th>상태</th></tr></thead>
       <tbody id="pb2"></tbody>
     </table></div>
@@ -342,45 +1648,61 @@ td{padding:9px 12px;vertical-align:middle}
     <div class="snum">STEP 04</div>
     <div class="stitle">✅ 변경 완료</div>
     <div class="rbar" id="rb2"></div>
-    <div class="twrap"><table>
+    <div class="tbar">
+      <select class="tsel" onchange="RV.set({filter:this.value})"><option value="all">전체</option><option value="ok">완료만</option><option value="error">실패만</option></select>
+    </div>
+    <div class="twrap vwrap" id="rw"><table class="vt">
       <thead><tr><th>결과</th><th>이전 파일명</th><th></th><th>변경된 파일명</th></tr></thead>
       <tbody id="rb3"></tbody>
     </table></div>
-    <div style="margin-top:14px"><button class="btn bc" onclick="reset()">🔄 다시 변환하기</button></div>
+    <div style="margin-top:14px;display:flex;gap:10px">
+      <button class="btn bc" onclick="reset()">🔄 다시 변환하기</button>
+      <button class="btn bgh" id="ub" onclick="undo()" style="display:none">↶ 변경 되돌리기</button>
+    </div>
+    <div class="st" id="st4"></div>
   </div>
 </div>
 <script>
 const KW=["제목","title","text","표제","도면명","name","글자","문자","annotation","drawing","titleblock"];
-let SF=[],SL="",PD=[];
+let SF=[],SL="",PJ=null,JR=null,CJ=null,ED=new Map();
 fetch("/api/info").then(r=>r.json()).then(i=>{
   const b=document.getElementById("cb");
   if(i.conv_type==="oda"){b.className="cbar ok";b.textContent="✅ ODA File Converter 감지됨 — DWG 처리 가능";}
   else if(i.conv_type==="lo"){b.className="cbar ok";b.textContent="✅ LibreOffice 감지됨 — DWG 처리 가능";}
   else{b.className="cbar warn";b.textContent="⚠️ DWG 변환기 없음 — DXF만 처리 가능 | ODA File Converter(무료) 또는 LibreOffice 설치 권장";}
 });
-function ss(id,m,t){const e=document.getElementById(id);e.className="st s "+t;e.innerHTML=t==="ld"?`<span class="spin"></span>${m}`:m;}
+function ss(id,m,t){const e=document.getElementById(id);e.className="st s "+t;e.innerHTML=t==="ld"?`<span class="spin"></span>${m}`+(CJ?`<button class="cx" onclick="cancelJob()">✕ 취소</button>`:""):m;}
 function cs(id){document.getElementById(id).className="st";}
 async function scan(){
   const f=document.getElementById("fp").value.trim();
   if(!f){ss("st1","❌ 폴더 경로를 입력해주세요.","er");return;}
   ss("st1",`${f} 스캔 중...`,"ld");
   ["s2","s3","s4"].forEach(id=>document.getElementById(id).style.display="none");
-  const r=await p("/api/scan",{folder:f});
-  if(!r.ok){ss("st1","❌ "+r.error,"er");return;}
-  SF=r.files;
-  ss("st1",`✅ ${r.files.length}개 발견 — DWG: ${r.files.filter(x=>x.ext==="DWG").length} / DXF: ${r.files.filter(x=>x.ext==="DXF").length}`,"ok");
-  buildL(r.layers);
+  let err="",lv={layers:[],stats:[],sampled:0};
+  SF=[];
+  const j=await runJob("scan",{folder:f,recursive:document.getElementById("rc").checked},m=>{
+    if(m.type==="error")err=m.error;
+    else if(m.type==="files")SF=SF.concat(m.files);
+    else if(m.type==="layers")lv=m;
+  },j=>ss("st1",`${f} 스캔 중... ${SF.length}개 중 ${j.done}개 확인`,"ld"));
+  if(j.status==="cancelled"){ss("st1","⏹ 스캔을 취소했습니다.","er");return;}
+  if(err||j.error){ss("st1","❌ "+(err||j.error),"er");return;}
+  ss("st1",`✅ ${SF.length}개 발견 — DWG: ${SF.filter(x=>x.ext==="DWG").length} / DXF: ${SF.filter(x=>x.ext==="DXF").length}`,"ok");
+  buildL(lv.stats,lv.sampled);
   document.getElementById("s2").style.display="block";
   document.getElementById("s2").scrollIntoView({behavior:"smooth",block:"start"});
 }
-function buildL(layers){
+function buildL(stats,n){
   const g=document.getElementById("lg");g.innerHTML="";SL="";document.getElementById("pb").disabled=true;
-  if(!layers.length){g.innerHTML=`<p style="color:var(--red);font-size:12px">텍스트 레이어 없음</p>`;return;}
-  const sl=[...layers].sort((a,b)=>(KW.some(k=>a.toLowerCase().includes(k))?0:1)-(KW.some(k=>b.toLowerCase().includes(k))?0:1));
-  sl.forEach((l,i)=>{
-    const rec=KW.some(k=>l.toLowerCase().includes(k));
+  if(!stats.length){g.innerHTML=`<p style="color:var(--red);font-size:12px">텍스트 레이어 없음</p>`;return;}
+  // 서버의 폴더 전체 포함률 순위가 기준, 포함 파일 수가 같을 때만 키워드로 보조 정렬
+  const kw=l=>KW.some(k=>l.toLowerCase().includes(k));
+  const sl=[...stats].sort((a,b)=>(b.files-a.files)||((kw(a.name)?0:1)-(kw(b.name)?0:1)));
+  sl.forEach((st,i)=>{
+    const l=st.name,rec=i===0||kw(l);
     const c=document.createElement("div");c.className="chip"+(i===0?" sel":"");
-    c.innerHTML=l+(rec?`<span class="crec">★추천</span>`:"");
+    c.title=`${n}개 파일 중 ${st.files}개 포함 · 텍스트 ${st.texts}개`;
+    c.innerHTML=e(l)+`<span class="ccov">${st.files}/${n}</span>`+(rec?`<span class="crec">★추천</span>`:"");
     c.onclick=()=>{document.querySelectorAll(".chip").forEach(x=>x.classList.remove("sel"));c.classList.add("sel");SL=l;document.getElementById("pb").disabled=false;};
     g.appendChild(c);
     if(i===0){SL=l;document.getElementById("pb").disabled=false;}
@@ -390,59 +1712,239 @@ async function preview(){
   if(!SL){ss("st2","❌ 레이어를 선택해주세요.","er");return;}
   ss("st2",`'${SL}' 레이어 텍스트 추출 중...`,"ld");
   document.getElementById("s3").style.display="none";document.getElementById("s4").style.display="none";
-  const r=await p("/api/preview",{files:SF,layer:SL});
-  if(!r.ok){ss("st2","❌ "+r.error,"er");return;}
-  PD=r.results;
-  ss("st2",`✅ 완료 — 성공: ${r.results.filter(x=>x.ok).length} / 실패: ${r.results.filter(x=>!x.ok).length}`,"ok");
-  buildP(r.results);
-  document.getElementById("s3").style.display="block";
-  document.getElementById("s3").scrollIntoView({behavior:"smooth",block:"start"});
-}
-function buildP(results){
-  const tb=document.getElementById("pb2");tb.innerHTML="";
-  results.forEach((r,i)=>{
-    const tr=document.createElement("tr");tr.className=r.ok?"rok":"rer";
-    const nv=r.ok?r.title:r.name.replace(/\.[^.]+$/,"");
-    const h=r.texts&&r.texts.length?r.texts.slice(0,4).join(" / "):"-";
-    tr.innerHTML=`<td><span class="ext ${r.ext==="DWG"?"dwg":""}">${r.ext}</span></td>
-      <td class="old">${e(r.name)}</td><td class="arr">→</td>
-      <td><input class="ed" id="n${i}" value="${e(nv)}"></td>
-      <td style="color:var(--gray);font-size:11px;max-width:180px;overflow:hidden;text-overflow:ellipsis;white-space:nowrap" title="${e(h)}">${e(h)}</td>
-      <td>${r.ok?`<span class="tok">✅ 성공</span>`:`<span class="ter">❌ ${e(r.error)}</span>`}</td>`;
-    tb.appendChild(tr);
+  PJ=null;ED.clear();document.getElementById("rb").disabled=true;   // 미리보기가 끝나야 변경 가능
+  const j=await runJob("preview",{files:SF,layer:SL,strategy:document.getElementById("ts").value},null,j=>{
+    if(PJ!==j.id){
+      PJ=j.id;PV.open(`/api/jobs/${j.id}/rows`);
+      document.getElementById("s3").style.display="block";
+      document.getElementById("s3").scrollIntoView({behavior:"smooth",block:"start"});
+    }else PV.refresh();
+    ss("st2",`'${SL}' 레이어 텍스트 추출 중... ${j.done} / ${SF.length}`,"ld");
   });
+  if(j.status==="error"){ss("st2","❌ "+j.error,"er");return;}
+  document.getElementById("rb").disabled=false;
+  if(PJ!==j.id){PJ=j.id;document.getElementById("s3").style.display="block";await PV.open(`/api/jobs/${j.id}/rows`);}
+  else await PV.refresh();
+  const c=PV.counts||{ok:0,error:0};
+  ss("st2",(j.status==="cancelled"?`⏹ 취소됨 — ${c.ok+c.error} / ${SF.length}개 처리, `:"✅ 완료 — ")+`성공: ${c.ok} / 실패: ${c.error}`,j.status==="cancelled"?"er":"ok");
+}
+// 가상 스크롤 표: 보이는 줄(+앞뒤 여유)만 그리고, 그 구간만 서버에서 페이지로 받아 옴
+const RH=38,OV=15;
+class VTable{
+  constructor(wrap,body,ncol,row,onload){
+    this.w=document.getElementById(wrap);this.tb=document.getElementById(body);this.n=ncol;this.row=row;this.onload=onload;
+    this.url=null;this.q={};this.total=0;this.counts=null;this.rows=new Map();this.seq=0;this.w.onscroll=()=>this.load(false);
+  }
+  open(url,q){this.url=url;this.q=q||{};this.rows.clear();this.total=0;this.w.scrollTop=0;return this.load(true);}
+  set(q){Object.assign(this.q,q);this.rows.clear();this.w.scrollTop=0;return this.load(true);}
+  refresh(){return this.load(true);}
+  span(){const a=Math.max(0,Math.floor(this.w.scrollTop/RH)-OV);return [a,a+Math.ceil((this.w.clientHeight||600)/RH)+2*OV];}
+  async load(force){
+    if(!this.url)return;
+    const [a,b]=this.span();
+    if(!force){let k=a;while(k<Math.min(b,this.total)&&this.rows.has(k))k++;if(k>=Math.min(b,this.total))return this.paint();}
+    const seq=++this.seq,q=new URLSearchParams({...this.q,offset:a,limit:b-a});
+    const r=await (await fetch(`${this.url}?${q}`)).json();
+    if(seq!==this.seq||!r.ok)return;   // 스크롤·필터 변경으로 더 최근 요청이 있음
+    if(force)this.rows.clear();
+    this.total=r.total;this.counts=r.counts;r.rows.forEach((x,k)=>this.rows.set(a+k,x));
+    this.paint(force);if(this.onload)this.onload(r);
+  }
+  paint(force){
+    // 진행 중 갱신은 새 파일명 입력 중이면 건너뜀 (포커스·커서 유지) — 스크롤하면 다시 그림
+    if(force&&this.tb.contains(document.activeElement))return;
+    const [a,b0]=this.span(),b=Math.min(b0,this.total),sp=h=>`<tr class="sp" style="height:${h*RH}px"><td colspan="${this.n}"></td></tr>`;
+    let h=sp(Math.min(a,this.total));
+    for(let k=a;k<b;k++){const r=this.rows.get(k);h+=r?this.row(r):`<tr><td colspan="${this.n}"><span class="spin"></span></td></tr>`;}
+    this.tb.innerHTML=h+sp(Math.max(0,this.total-b));
+  }
+}
+const PV=new VTable("pw","pb2",6,rowP,r=>{document.getElementById("pc").textContent=`성공 ${r.counts.ok} · 실패 ${r.counts.error}`+(r.counts.pending?` · 처리 중 ${r.counts.pending}`:"")+` / 전체 ${r.counts.all}`;});
+const RV=new VTable("rw","rb3",4,rowR);
+function rowP(r){
+  const ext=`<td><span class="ext ${r.ext==="DWG"?"dwg":""}">${r.ext}</span></td><td class="old" title="${e(r.rel||r.name)}">${e(r.rel||r.name)}</td><td class="arr">→</td>`;
+  if(r.pending)return `<tr>${ext}<td style="color:var(--gray)">-</td><td></td><td><span class="spin"></span></td></tr>`;
+  const nv=ED.has(r.i)?ED.get(r.i):(r.ok?r.title:r.name.replace(/\.[^.]+$/,""));
+  const h=r.texts&&r.texts.length?r.texts.slice(0,4).join(" / "):"-";
+  return `<tr class="${r.ok?"rok":"rer"}">${ext}
+    <td><input class="ed" value="${e(nv)}" oninput="ED.set(${r.i},this.value)"></td>
+    <td style="color:var(--gray);font-size:11px;max-width:180px" title="${e(h)}">${e(h)}</td>
+    <td>${r.ok?`<span class="tok">✅ 성공</span>`:`<span class="ter" title="${e(r.error)}">❌ ${e(r.error)}</span>`}</td></tr>`;
+}
+function rowR(r){
+  return r.ok?`<tr class="rdn"><td><span class="tdn">✅ 완료</span></td><td class="old">${e(r.old)}</td><td class="arr">→</td><td class="nw">${e(r.new)}</td></tr>`
+             :`<tr class="rer"><td><span class="ter">❌ 실패</span></td><td class="old">${e(r.name)}</td><td></td><td style="color:var(--red);font-size:11px">${e(r.error)}</td></tr>`;
 }
 async function doRename(){
-  const items=PD.map((r,i)=>({path:r.path,new_name:(document.getElementById(`n${i}`)?.value||"").trim()})).filter(x=>x.new_name);
-  if(!items.length){ss("st3","❌ 변경할 항목이 없습니다.","er");return;}
+  if(!PJ){ss("st3","❌ 변경할 항목이 없습니다.","er");return;}
+  document.activeElement&&document.activeElement.blur();
   document.getElementById("rb").disabled=true;
-  ss("st3",`${items.length}개 변경 중...`,"ld");
-  const r=await p("/api/rename",{items});cs("st3");
-  buildR(r.done,r.fail);
+  ss("st3","변경 중...","ld");
+  const j=await runJob("rename",{preview:PJ,edits:Object.fromEntries(ED)});
+  document.getElementById("rb").disabled=false;
+  if(j.status==="error"){ss("st3","❌ "+j.error,"er");return;}
+  cs("st3");cs("st4");
+  buildR(j.result);JR=j.result.journal;
+  RV.open(`/api/jobs/${j.id}/rows`);
+  document.getElementById("ub").style.display=JR?"inline-flex":"none";
   document.getElementById("s4").style.display="block";
   document.getElementById("s4").scrollIntoView({behavior:"smooth",block:"start"});
-  document.getElementById("rb").disabled=false;
 }
-function buildR(done,fail){
+function buildR(r){
   document.getElementById("rb2").innerHTML=`
-    <div class="rc"><div class="rv" style="color:var(--cyan)">${done.length+fail.length}</div><div class="rl">전체</div></div>
-    <div class="rc"><div class="rv" style="color:var(--green)">${done.length}</div><div class="rl">성공</div></div>
-    <div class="rc"><div class="rv" style="color:var(--red)">${fail.length}</div><div class="rl">실패</div></div>`;
-  const tb=document.getElementById("rb3");tb.innerHTML="";
-  done.forEach(d=>{const tr=document.createElement("tr");tr.className="rdn";tr.innerHTML=`<td><span class="tdn">✅ 완료</span></td><td class="old">${e(d.old)}</td><td class="arr">→</td><td class="nw">${e(d.new)}</td>`;tb.appendChild(tr);});
-  fail.forEach(f=>{const tr=document.createElement("tr");tr.className="rer";tr.innerHTML=`<td><span class="ter">❌ 실패</span></td><td class="old">${e(f.name)}</td><td></td><td style="color:var(--red);font-size:11px">${e(f.error)}</td>`;tb.appendChild(tr);});
+    <div class="rc"><div class="rv" style="color:var(--cyan)">${r.done+r.fail}</div><div class="rl">전체</div></div>
+    <div class="rc"><div class="rv" style="color:var(--green)">${r.done}</div><div class="rl">성공</div></div>
+    <div class="rc"><div class="rv" style="color:var(--red)">${r.fail}</div><div class="rl">실패</div></div>`;
+}
+async function undo(){
+  if(!JR||!confirm("방금 변경한 파일명을 원래대로 되돌릴까요?"))return;
+  document.getElementById("ub").disabled=true;
+  ss("st4","되돌리는 중...","ld");
+  const r=await p("/api/undo",{journal:JR});
+  document.getElementById("ub").disabled=false;
+  if(r.fail.length)ss("st4",`❌ ${r.done.length}개 복원 / ${r.fail.length}개 실패 — `+r.fail.map(f=>e(f.name+": "+f.error)).join(", "),"er");
+  else{ss("st4",`✅ ${r.done.length}개 파일명을 원래대로 복원했습니다.`,"ok");JR=null;document.getElementById("ub").style.display="none";}
 }
-function reset(){SF=[];SL="";PD=[];document.getElementById("fp").value="";["s2","s3","s4"].forEach(id=>document.getElementById(id).style.display="none");["st1","st2","st3"].forEach(id=>document.getElementById(id).className="st");document.getElementById("rb").disabled=false;window.scrollTo({top:0,behavior:"smooth"});}
+function reset(){cancelJob();SF=[];SL="";PJ=null;ED.clear();document.getElementById("fp").value="";["s2","s3","s4"].forEach(id=>document.getElementById(id).style.display="none");["st1","st2","st3","st4"].forEach(id=>document.getElementById(id).className="st");document.getElementById("rb").disabled=false;window.scrollTo({top:0,behavior:"smooth"});}
 function e(s){return String(s).replace(/&/g,"&amp;").replace(/</g,"&lt;").replace(/>/g,"&gt;").replace(/"/g,"&quot;")}
 async function p(url,body){const r=await fetch(url,{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify(body)});return r.json();}
+// 백그라운드 작업 시작 후 완료될 때까지 폴링 — on(이벤트), prog(작업 요약: done/total/status)
+// on이 없으면 이벤트는 받지 않고 요약만 조회 (행은 페이지 API로)
+async function runJob(kind,body,on,prog){
+  const r=await p("/api/jobs",{...body,kind});
+  if(!r.ok)return {status:"error",error:r.error};
+  let j=r.job,off=0;if(kind!=="rename")CJ=j.id;
+  for(;;){
+    const q=await (await fetch(on?`/api/jobs/${j.id}/results?offset=${off}`:`/api/jobs/${j.id}`)).json();
+    j=q.job;if(on){off=q.next;q.events.forEach(on);}
+    if(j.finished)break;
+    if(prog)prog(j);
+    await new Promise(ok=>setTimeout(ok,400));
+  }
+  CJ=null;return j;
+}
+function cancelJob(){if(CJ)p(`/api/jobs/${CJ}/cancel`,{});}
 </script>
 </body></html>"""
 
+# ── 명령줄 일괄 처리 (서버·브라우저 없이) ──────────────────
+# 예) cad_renamer.py batch D:\도면\A D:\도면\B --layer auto --format csv --out plan.csv
+#     cad_renamer.py batch --manifest folders.txt --apply --out applied.jsonl
+#     cad_renamer.py undo   (가장 최근 변경 되돌리기, resume 은 중단된 변경 이어하기)
+#     cad_renamer.py watch D:\도면 --recursive --interval 30   (새 도면이 들어오는 대로 색인 갱신)
+PLAN_FIELDS = ["folder","name","path","layer","title","new_name","ok","error","applied","new","journal"]
+
+def _read_manifest(path):
+    jobs = []
+    for line in Path(path).read_text(encoding="utf-8-sig").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"): continue
+        folder, _, layer = line.partition("\t")   # 폴더<TAB>레이어 로 폴더별 레이어 지정 가능
+        jobs.append((folder.strip(), layer.strip() or None))
+    return jobs
+
+def plan_folder(folder, layer="auto", strategy=None, recursive=False):
+    files = list_cad_files(folder, recursive)
+    if not files: return []
+    if layer.lower() == "auto":
+        stats = []
+        for _, _, stats in layer_stats([fi["path"] for fi in files]): pass
+        layer = stats[0]["name"] if stats else ""
+    if not layer:
+        return [{"folder":folder,"name":fi["name"],"path":fi["path"],"layer":"","title":"","new_name":"",
+                 "ok":False,"error":"텍스트 레이어 없음"} for fi in files]
+    rows = [None] * len(files)
+    for i, r in preview_rows(files, layer, strategy):
+        rows[i] = {"folder":folder,"name":r["name"],"path":r["path"],"layer":layer,"title":r["title"],
+                   "new_name":r["title"] if r["ok"] else "","ok":r["ok"],"error":r["error"]}
+    return rows
+
+def _write_rows(rows, fmt, out):
+    if fmt == "csv":
+        w = csv.DictWriter(out, PLAN_FIELDS, extrasaction="ignore"); w.writeheader()
+        for r in rows: w.writerow(r)
+    else:
+        for r in rows: out.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+# --noconsole로 빌드한 창 모드 EXE에는 표준출력·표준오류가 없음(None) → 명령줄 출력은 로그 파일에 덧붙임
+# (결과를 바로 보려면 콘솔용 EXE를 쓰거나 --out 으로 결과 파일 지정)
+CLI_LOG = CACHE_DIR.parent / "cli.log"
+
+def cli(argv):
+    global PARSE_WORKERS, CONV_WORKERS
+    if sys.stdout is None or sys.stderr is None:
+        CLI_LOG.parent.mkdir(parents=True, exist_ok=True)
+        log = open(CLI_LOG, "a", encoding="utf-8", buffering=1)
+        sys.stdout = sys.stdout or log; sys.stderr = sys.stderr or log
+    ap = argparse.ArgumentParser(prog="cad_renamer", description="CAD 도면 파일명 일괄 변환 (명령줄)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("batch", help="폴더의 DWG/DXF 제목 추출 → 변경 계획 출력 (--apply 시 실제 변경)")
+    b.add_argument("folders", nargs="*", help="대상 폴더")
+    b.add_argument("--manifest", help="폴더 목록 파일 (한 줄에 하나, 폴더<TAB>레이어 가능)")
+    b.add_argument("--recursive", action="store_true", help="하위 폴더 포함")
+    b.add_argument("--layer", default="auto", help="제목 레이어 이름 또는 auto (폴더별 포함률 1위)")
+    b.add_argument("--strategy", choices=sorted(TITLE_STRATEGIES), default=TITLE_STRATEGY,
+                   help="제목 선택 방식 (leftmost: 가장 왼쪽, largest: 가장 큰 글자, titleblock: 표제란 영역)")
+    b.add_argument("--apply", action="store_true", help="계획대로 실제 파일명 변경")
+    b.add_argument("--format", choices=("jsonl","csv"), default="jsonl")
+    b.add_argument("--out", default="-", help="결과 파일 (기본: 표준출력)")
+    b.add_argument("--workers", type=int, default=PARSE_WORKERS, help="파싱 프로세스 수")
+    b.add_argument("--conv-workers", type=int, default=CONV_WORKERS, help="동시 변환기 실행 수")
+    for cmd, desc in (("undo","파일명 변경 되돌리기"), ("resume","중단된 파일명 변경 이어하기")):
+        sub.add_parser(cmd, help=desc).add_argument("journal", nargs="?", help="저널 파일 이름 (기본: 가장 최근)")
+    w = sub.add_parser("watch", help="폴더를 주기적으로 다시 훑어 바뀐 도면만 색인에 반영 (Ctrl+C로 종료)")
+    w.add_argument("folder")
+    w.add_argument("--recursive", action="store_true", help="하위 폴더 포함")
+    w.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="다시 훑는 간격(초)")
+    a = ap.parse_args(argv)
+    if a.cmd == "watch":
+        first = True
+        try:
+            for ev in watch_events({"folder":a.folder,"recursive":a.recursive,"interval":a.interval}):
+                if ev["type"] == "error": print(ev["error"], file=sys.stderr); return 1
+                if ev["type"] == "progress": continue
+                if ev["type"] == "pass" and not (first or ev["indexed"] or ev["removed"]): continue
+                print(json.dumps(ev, ensure_ascii=False), flush=True); first = first and ev["type"] != "pass"
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if a.cmd in ("undo","resume"):
+        done, fail, journal = (undo_journal if a.cmd == "undo" else resume_journal)(a.journal)
+        print(json.dumps({"journal":journal,"done":done,"fail":fail}, ensure_ascii=False, indent=1))
+        return 0 if not fail else 1
+    PARSE_WORKERS, CONV_WORKERS = max(1, a.workers), max(1, a.conv_workers)
+
+    jobs = [(f, None) for f in a.folders] + (_read_manifest(a.manifest) if a.manifest else [])
+    if not jobs: ap.error("폴더 또는 --manifest 를 지정하세요.")
+    rows = []
+    for folder, layer in jobs:
+        if not os.path.isdir(folder):
+            rows.append({"folder":folder,"ok":False,"error":"폴더를 찾을 수 없습니다."}); continue
+        plan = plan_folder(folder, layer or a.layer, a.strategy, a.recursive)
+        if a.apply:
+            todo = [r for r in plan if r["ok"]]
+            done, fail, journal = rename_items([{"path":r["path"],"new_name":r["new_name"]} for r in todo])
+            # 하위 폴더마다 같은 파일명이 있을 수 있으므로 원본 전체 경로로 대응
+            new = {d["path"]: d["new"] for d in done}; err = {f["path"]: f["error"] for f in fail}
+            for r in todo:
+                src = os.path.abspath(r["path"])
+                r["applied"] = src in new; r["new"] = new.get(src, ""); r["journal"] = journal or ""
+                if src in err: r["ok"], r["error"] = False, err[src]
+        rows += plan
+    out = sys.stdout if a.out == "-" else open(a.out, "w", encoding="utf-8-sig" if a.format == "csv" else "utf-8", newline="")
+    try: _write_rows(rows, a.format, out)
+    finally:
+        if out is not sys.stdout: out.close()
+    return 0 if all(r.get("ok") for r in rows) else 1
+
 # ── 실행 ─────────────────────────────────────────────────
 if __name__ == "__main__":
-    server = http.server.HTTPServer(("127.0.0.1", PORT), Handler)
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1: sys.exit(cli(sys.argv[1:]))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", PORT), Handler)
     print(f"\n  🗂  CAD 도면 파일명 변환기\n  브라우저: http://localhost:{PORT}\n  종료: 창 닫기\n")
     threading.Thread(target=lambda: (time.sleep(0.9), webbrowser.open(f"http://localhost:{PORT}")), daemon=True).start()
+    threading.Thread(target=warm_pools, daemon=True).start()
     try:
         server.serve_forever()
     except KeyboardInterrupt: